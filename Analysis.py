@@ -1,7 +1,24 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+
+import queries
+from data import (
+    BACKEND,
+    active_backend,
+    CSV_PATH,
+    DB_PATH,
+    load_catalog,
+    query_backend,
+    raw_backend,
+    report_first_paint,
+    select_partitions,
+    start_page_timer,
+    start_warm_up,
+    table_exists,
+)
+from locations import BAND_LABELS, NO_DISTANCE
+from ratings_stats import BIN_WIDTH
 
 # --------------------------------
 # CONFIG
@@ -11,7 +28,8 @@ st.set_page_config(
     layout="wide"
 )
 
-DB_PATH = "ncr_ride_analytics.db"
+page_started = start_page_timer()
+start_warm_up()
 
 # --------------------------------
 # COLOR PALETTES
@@ -27,61 +45,70 @@ PAYMENT_COLORS = px.colors.qualitative.Pastel
 TIME_SERIES_COLOR = "#3498DB"
 HEATMAP_SCALE = "YlOrRd"
 
-# --------------------------------
-# DB HELPERS
-# --------------------------------
-def load_df(query):
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
+PREVIEW_ROWS = 10_000
 
 # --------------------------------
-# LOAD RAW CSV
+# PARTITION PRUNING
 # --------------------------------
-@st.cache_data
-def load_csv():
-    df = pd.read_csv("ncr_ride_bookings_clean.csv")
-    df["Date"] = pd.to_datetime(df["Date"])
-    df["DayOfWeek"] = df["Date"].dt.day_name()
-    df["Hour"] = pd.to_datetime(df["Time"], errors="coerce").dt.hour
-    return df
+st.sidebar.header("🎛 Filters")
+
+catalog = load_catalog()
+if catalog.empty:
+    dbs, csvs = (DB_PATH,), (CSV_PATH,)
+else:
+    selected_city = st.sidebar.selectbox("City", catalog["city"].unique().tolist())
+    city_months = catalog.loc[catalog["city"] == selected_city, "month"].tolist()
+    first_month, last_month = st.sidebar.select_slider(
+        "Months", city_months, (city_months[0], city_months[-1])
+    )
+    dbs, csvs = select_partitions(selected_city, first_month, last_month)
+    st.sidebar.caption(f"Reading {len(dbs)} of {len(catalog)} partitions")
 
-raw_df = load_csv()
+backend = active_backend(csvs)
+if backend != BACKEND:
+    st.info("The cleaned files DuckDB reads are missing; serving the SQLite tables instead.")
+engine, sources = query_backend(dbs, csvs)
 
 # --------------------------------
 # LOAD FILTER DIMENSIONS
 # --------------------------------
-ride_status_list = load_df("SELECT DISTINCT status FROM ride_status_distribution")["status"].tolist()
-vehicle_list = load_df("SELECT DISTINCT vehicle_type FROM vehicle_demand")["vehicle_type"].tolist()
-pickup_list = load_df("SELECT DISTINCT location FROM top_pickup_locations")["location"].tolist()
-drop_list = load_df("SELECT DISTINCT location FROM top_drop_locations")["location"].tolist()
-payment_list = load_df("SELECT DISTINCT method FROM payment_methods")["method"].tolist()
+ride_status_list = engine.distinct(sources, "status", "ride_status_distribution")
+vehicle_list = engine.distinct(sources, "vehicle_type", "vehicle_demand")
+pickup_list = engine.distinct(sources, "location", "top_pickup_locations")
+drop_list = engine.distinct(sources, "location", "top_drop_locations")
+payment_list = engine.distinct(sources, "method", "payment_methods")
 
 # --------------------------------
 # SIDEBAR FILTERS
 # --------------------------------
-st.sidebar.header("🎛 Filters")
-
 selected_status = st.sidebar.multiselect("Ride Status", ride_status_list, ride_status_list)
 selected_vehicle = st.sidebar.multiselect("Vehicle Type", vehicle_list, vehicle_list)
 selected_pickup = st.sidebar.multiselect("Pickup Location", pickup_list, pickup_list)
 selected_drop = st.sidebar.multiselect("Drop Location", drop_list, drop_list)
 selected_payment = st.sidebar.multiselect("Payment Method", payment_list, payment_list)
 
-def sql_in(values):
-    return "(" + ",".join(f"'{v}'" for v in values) + ")"
-
 # --------------------------------
 # LOAD SQL DATA
 # --------------------------------
-summary = load_df("SELECT * FROM summary_metrics")
-ride_status = load_df(f"SELECT * FROM ride_status_distribution WHERE status IN {sql_in(selected_status)}")
-vehicles = load_df(f"SELECT * FROM vehicle_demand WHERE vehicle_type IN {sql_in(selected_vehicle)}")
-pickup = load_df(f"SELECT * FROM top_pickup_locations WHERE location IN {sql_in(selected_pickup)}")
-drop = load_df(f"SELECT * FROM top_drop_locations WHERE location IN {sql_in(selected_drop)}")
-payment = load_df(f"SELECT * FROM payment_methods WHERE method IN {sql_in(selected_payment)}")
-cancel = load_df("SELECT * FROM cancellations")
+summary = engine.kpis(sources)
+ride_status = engine.ride_status(sources, selected_status)
+vehicles = engine.vehicle_demand(sources, selected_vehicle)
+pickup = engine.top_pickups(sources, selected_pickup)
+drop = engine.top_drops(sources, selected_drop)
+payment = engine.payment_methods(sources, selected_payment)
+cancel = engine.cancellations(sources)
+
+has_rating_store = backend == "sqlite" and table_exists("rating_stats", dbs[0])
+if has_rating_store:
+    rating_stats, rating_hists = queries.load_rating_store(dbs)
+
+kpi_help = {
+    row.metric: f"{row.value:.2f} ± {row.ci:.2f} (95% CI, n={int(row.n):,})"
+    if row.ci is not None and row.ci == row.ci else f"Exact sum over n={int(row.n):,} valued bookings"
+    for row in summary.dropna(subset=["n"]).itertuples()
+}
+has_revenue = backend == "duckdb" or table_exists("revenue_segments", dbs[0])
+alerts = queries.anomalies(dbs) if table_exists("anomalies", dbs[0]) else None
 
 # --------------------------------
 # HEADER
@@ -94,7 +121,23 @@ st.title("🚕 Uber Ride Analytics Dashboard")
 st.subheader("📌 Key Metrics")
 cols = st.columns(len(summary))
 for col, row in zip(cols, summary.itertuples()):
-    col.metric(row.metric, f"{row.value:,.2f}")
+    col.metric(row.metric, f"{row.value:,.2f}", help=kpi_help.get(row.metric))
+
+# --------------------------------
+# ANOMALIES
+# --------------------------------
+if alerts is not None and not alerts.empty:
+    latest = alerts["date"].max()
+    st.warning(f"🚨 {(alerts['date'] == latest).sum()} anomalies flagged on {latest} "
+               f"({len(alerts)} recent in total)")
+    with st.expander("🚨 Anomalies (volume, cancellation rate, booking value)"):
+        metric_filter = st.multiselect("Metric", sorted(alerts["metric"].unique()),
+                                       sorted(alerts["metric"].unique()))
+        shown = alerts[alerts["metric"].isin(metric_filter)]
+        fig = px.scatter(shown, x="date", y="z", color="metric", hover_data=["pickup_location", "hour", "value", "expected"],
+                         title="Deviation from seasonal baseline (z-score)")
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(shown, hide_index=True, use_container_width=True)
 
 # --------------------------------
 # RIDE DISTRIBUTION
@@ -156,6 +199,119 @@ with c4:
     )
     st.plotly_chart(fig, use_container_width=True)
 
+# --------------------------------
+# REVENUE
+# --------------------------------
+REVENUE_BREAKDOWNS = {
+    # label -> (revenue segment, sidebar selection that narrows it)
+    "Vehicle Type": ("vehicle", selected_vehicle),
+    "Payment Method": ("payment", selected_payment),
+    "Ride Status": ("status", selected_status),
+    "Pickup Location": ("pickup_location", None),
+}
+
+if has_revenue:
+    st.subheader("💰 Revenue")
+
+    breakdown = st.radio("Break down by", list(REVENUE_BREAKDOWNS), horizontal=True)
+    segment, selected = REVENUE_BREAKDOWNS[breakdown]
+    by_segment = engine.revenue(sources, segment)
+    by_segment = by_segment[by_segment["valued"] > 0]
+    if selected is not None:
+        by_segment = by_segment[by_segment["segment_value"].isin(selected)]
+    by_segment = by_segment.nlargest(10, "revenue")
+
+    c_rev1, c_rev2 = st.columns(2)
+
+    with c_rev1:
+        fig = px.bar(
+            by_segment,
+            x="segment_value",
+            y=["completed_revenue", "revenue"],
+            barmode="group",
+            labels={"segment_value": breakdown, "value": "Revenue", "variable": ""},
+            title=f"Revenue by {breakdown}"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with c_rev2:
+        fig = px.bar(
+            by_segment,
+            x="segment_value",
+            y="avg_value",
+            color="segment_value",
+            color_discrete_sequence=PAYMENT_COLORS,
+            labels={"segment_value": breakdown, "avg_value": "Average Booking Value"},
+            hover_data=["valued"],
+            title=f"Average Booking Value by {breakdown}"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    daily_revenue = engine.revenue(sources, "day").sort_values("segment_value")
+    fig = px.line(
+        daily_revenue,
+        x="segment_value",
+        y="completed_revenue",
+        labels={"segment_value": "Date", "completed_revenue": "Revenue (Completed)"},
+        title="Daily Revenue (Completed)"
+    )
+    fig.update_traces(line_color=TIME_SERIES_COLOR)
+    st.plotly_chart(fig, use_container_width=True)
+
+# --------------------------------
+# ZONES
+# --------------------------------
+if backend == "duckdb" or table_exists("location_dim", dbs[0]):
+    st.subheader("🗺️ Zones")
+
+    zone_pickups = engine.zone_pickups(sources).dropna(subset=["lat", "lon"])
+
+    c_zone1, c_zone2 = st.columns(2)
+
+    with c_zone1:
+        fig = px.scatter_map(
+            zone_pickups,
+            lat="lat",
+            lon="lon",
+            size="trips",
+            color="zone",
+            hover_name="name",
+            zoom=8.5,
+            map_style="carto-positron",
+            title="Pickups by Location"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with c_zone2:
+        fig = px.bar(
+            engine.zone_bands(sources),
+            x="zone",
+            y="trips",
+            color="band",
+            category_orders={"band": BAND_LABELS + [NO_DISTANCE]},
+            title="Ride Distance Bands by Pickup Zone"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    z1, z2 = st.columns(2)
+    center = z1.selectbox("Rides within reach of", sorted(zone_pickups["name"]))
+    radius = z2.slider("Radius (km)", 1, 30, 5)
+    nearby = engine.rides_within(sources, center, radius)
+    st.metric(f"Pickups within {radius} km of {center}", f"{nearby['trips'].sum():,}")
+    st.dataframe(nearby[["name", "zone", "km", "trips"]], hide_index=True, use_container_width=True)
+
+report_first_paint("Dashboard", page_started)
+
+# --------------------------------
+# LOAD RAW CSV
+# --------------------------------
+# Everything above is served from SQLite; the CSV is usually already warm by now.
+raw, raw_source = raw_backend(csvs)
+if backend == "sqlite" and raw_source.empty:
+    st.info("Raw bookings are not part of this deployment; CSV-backed charts below are empty.")
+
+status_counts = raw.status_counts(raw_source)
+
 # --------------------------------
 # BOOKING OVERVIEW
 # --------------------------------
@@ -165,8 +321,9 @@ c5, c6 = st.columns(2)
 
 with c5:
     fig = px.pie(
-        raw_df,
+        status_counts,
         names="Booking Status",
+        values="count",
         hole=0.4,
         color="Booking Status",
         color_discrete_map=STATUS_COLORS,
@@ -175,9 +332,10 @@ with c5:
     st.plotly_chart(fig, use_container_width=True)
 
 with c6:
-    fig = px.histogram(
-        raw_df,
+    fig = px.bar(
+        status_counts,
         x="Booking Status",
+        y="count",
         color="Booking Status",
         color_discrete_map=STATUS_COLORS,
         title="Completed vs Cancelled vs Incomplete"
@@ -212,24 +370,63 @@ with c8:
     )
     st.plotly_chart(fig, use_container_width=True)
 
+# --------------------------------
+# CANCELLATION DRILL-DOWN
+# --------------------------------
+if backend == "duckdb" or table_exists("cancellation_facts", dbs[0]):
+    with st.expander("🔎 Why and where are rides cancelled?"):
+        d1, d2 = st.columns(2)
+        canceller = d1.selectbox("Cancelled by", ["Customer", "Driver"])
+
+        reasons = engine.cancellation_reasons(sources, canceller, selected_vehicle)
+        reason = d2.selectbox("Reason", ["All reasons"] + reasons["reason"].tolist())
+        reason = None if reason == "All reasons" else reason
+
+        zones = engine.cancellation_zones(sources, canceller, reason, selected_vehicle)
+        hours = engine.cancellation_hours(sources, canceller, reason, selected_vehicle)
+
+        fig = px.bar(reasons, x="total", y="reason", orientation="h",
+                     color_discrete_sequence=["#E74C3C"],
+                     title=f"{canceller} Cancellation Reasons")
+        st.plotly_chart(fig, use_container_width=True)
+
+        d3, d4 = st.columns(2)
+        with d3:
+            fig = px.bar(zones, x="total", y="pickup_location", orientation="h",
+                         color="total", color_continuous_scale="Reds",
+                         title="Top Pickup Zones")
+            st.plotly_chart(fig, use_container_width=True)
+        with d4:
+            fig = px.bar(hours, x="hour", y="total",
+                         color_discrete_sequence=["#F39C12"],
+                         title="Cancellations by Hour of Day")
+            st.plotly_chart(fig, use_container_width=True)
+
 # --------------------------------
 # TIME & DEMAND
 # --------------------------------
 st.header("⏱️ Time & Demand Patterns")
 
-daily = raw_df.groupby("Date").size().reset_index(name="Rides")
+daily = raw.rides_by(raw_source, "Date")
 fig = px.line(daily, x="Date", y="Rides", markers=True,
               color_discrete_sequence=[TIME_SERIES_COLOR],
               title="Total Rides Over Time")
+if alerts is not None:
+    # Days with an overall demand anomaly in any hour.
+    spikes = daily[daily["Date"].astype(str).isin(
+        alerts.loc[(alerts["metric"] == "rides") & (alerts["pickup_location"] == "all"), "date"]
+    )]
+    fig.add_scatter(x=spikes["Date"], y=spikes["Rides"], mode="markers", name="Demand anomaly",
+                    marker=dict(color="#E74C3C", size=10, symbol="x"))
 st.plotly_chart(fig, use_container_width=True)
 
-dow = raw_df.groupby("DayOfWeek").size().reset_index(name="Rides")
+dow = raw.rides_by(raw_source, "DayOfWeek")
 fig = px.bar(dow, x="DayOfWeek", y="Rides",
              color="Rides", color_continuous_scale="Viridis",
              title="Rides by Day of Week")
 st.plotly_chart(fig, use_container_width=True)
 
-hourly = raw_df.groupby("Hour").size().reset_index(name="Rides")
+hourly = raw.rides_by(raw_source, "Hour")
 fig = px.area(hourly, x="Hour", y="Rides",
               color_discrete_sequence=["#9B59B6"],
               title="Rides by Hour of Day")
@@ -241,7 +438,7 @@ st.plotly_chart(fig, use_container_width=True)
 st.header("🚗 Vehicle Type Performance")
 
 fig = px.bar(
-    raw_df.groupby("Vehicle Type").size().reset_index(name="Bookings"),
+    raw.rides_by(raw_source, "Vehicle Type").rename(columns={"Rides": "Bookings"}),
     x="Vehicle Type",
     y="Bookings",
     color="Vehicle Type",
@@ -250,14 +447,19 @@ fig = px.bar(
 )
 st.plotly_chart(fig, use_container_width=True)
 
-fig = px.box(
-    raw_df,
-    x="Vehicle Type",
-    y="Booking Value",
-    color="Vehicle Type",
-    color_discrete_sequence=VEHICLE_COLORS,
-    title="Booking Value by Vehicle Type"
-)
+# Boxes are drawn from per-vehicle quartiles so no raw values have to reach the browser.
+box = raw.booking_value_box(raw_source)
+fig = go.Figure([
+    go.Box(
+        name=row["Vehicle Type"],
+        q1=[row["q1"]], median=[row["median"]], q3=[row["q3"]],
+        lowerfence=[row["min"]], upperfence=[row["max"]],
+        marker_color=VEHICLE_COLORS[i % len(VEHICLE_COLORS)]
+    )
+    for i, row in box.iterrows()
+])
+fig.update_layout(title="Booking Value by Vehicle Type",
+                  xaxis_title="Vehicle Type", yaxis_title="Booking Value")
 st.plotly_chart(fig, use_container_width=True)
 
 # --------------------------------
@@ -265,8 +467,7 @@ st.plotly_chart(fig, use_container_width=True)
 # --------------------------------
 st.header("📍 Location Intelligence")
 
-heat = raw_df.groupby(["Pickup Location", "Drop Location"]).size().reset_index(name="Trips")
-heat = heat.sort_values("Trips", ascending=False).head(50)
+heat = raw.od_counts(raw_source, 50)
 
 fig = px.density_heatmap(
     heat,
@@ -283,15 +484,50 @@ st.plotly_chart(fig, use_container_width=True)
 # --------------------------------
 st.header("⭐ Service Quality")
 
-fig = px.histogram(raw_df, x="Driver Ratings", nbins=20,
-                   color_discrete_sequence=["#1ABC9C"],
-                   title="Driver Rating Distribution")
-st.plotly_chart(fig, use_container_width=True)
-
-fig = px.histogram(raw_df, x="Customer Rating", nbins=20,
-                   color_discrete_sequence=["#F39C12"],
-                   title="Customer Rating Distribution")
-st.plotly_chart(fig, use_container_width=True)
+if has_rating_store:
+    def rating_segment(rating, segment):
+        return rating_stats.loc[(rating, segment)].reset_index()
+
+    for rating, label, color in [("driver", "Driver", "#1ABC9C"), ("customer", "Customer", "#F39C12")]:
+        hist = rating_hists.loc[(rating, "all", "all")].reset_index()
+        hist["Rating"] = hist["bin"] * BIN_WIDTH
+        fig = px.bar(hist, x="Rating", y="count",
+                     color_discrete_sequence=[color],
+                     title=f"{label} Rating Distribution")
+        fig.update_traces(width=BIN_WIDTH * 0.9, offset=0)
+        st.plotly_chart(fig, use_container_width=True)
+
+    q1, q2 = st.columns(2)
+    with q1:
+        by_vehicle = rating_segment("driver", "vehicle")
+        by_vehicle = by_vehicle[by_vehicle["segment_value"].isin(selected_vehicle)]
+        fig = px.bar(by_vehicle, x="segment_value", y="mean", error_y="ci",
+                     color="segment_value", color_discrete_sequence=VEHICLE_COLORS,
+                     labels={"segment_value": "Vehicle Type", "mean": "Avg Driver Rating"},
+                     title="Driver Rating by Vehicle Type (95% CI)")
+        fig.update_yaxes(range=[max(0, by_vehicle["mean"].min() - 0.5), 5])
+        st.plotly_chart(fig, use_container_width=True)
+    with q2:
+        by_location = rating_segment("driver", "pickup_location").nsmallest(10, "mean")
+        fig = px.scatter(by_location, x="mean", y="segment_value", error_x="ci", size="n",
+                         color_discrete_sequence=["#E74C3C"],
+                         labels={"segment_value": "Pickup Location", "mean": "Avg Driver Rating"},
+                         title="Lowest-Rated Pickup Locations (95% CI)")
+        st.plotly_chart(fig, use_container_width=True)
+
+    by_day = rating_segment("driver", "day").sort_values("segment_value")
+    fig = px.line(by_day, x="segment_value", y="mean", error_y="ci",
+                  color_discrete_sequence=[TIME_SERIES_COLOR],
+                  labels={"segment_value": "Date", "mean": "Avg Driver Rating"},
+                  title="Daily Driver Rating (95% CI)")
+    st.plotly_chart(fig, use_container_width=True)
+else:
+    for column, color in [("Driver Ratings", "#1ABC9C"), ("Customer Rating", "#F39C12")]:
+        fig = px.bar(raw.rating_histogram(raw_source, column), x="Rating", y="count",
+                     color_discrete_sequence=[color],
+                     title=f"{column.split()[0]} Rating Distribution")
+        fig.update_traces(width=BIN_WIDTH * 0.9, offset=0)
+        st.plotly_chart(fig, use_container_width=True)
 
 # --------------------------------
 # RAW TABLES
@@ -305,8 +541,14 @@ with st.expander("📂 View SQL Tables"):
     
 st.header("📄 Full Uber Ride Dataset")
 
+if backend == "duckdb":
+    st.caption(f"First {PREVIEW_ROWS:,} rows, read directly from the cleaned files.")
+    dataset = raw.preview(raw_source, PREVIEW_ROWS)
+else:
+    dataset = raw_source
+
 st.dataframe(
-    raw_df,
+    dataset,
     use_container_width=True,
     height=600
 )
@@ -0,0 +1,331 @@
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+NULL_TOKENS = ["NULL", "null", "NaN", "nan", ""]
+CHUNK_ROWS = 200_000
+ALL_LOCATIONS = "all"
+
+# Seasonal EWMA: one baseline per (metric, pickup location, hour of day), observed once a day and
+# decayed by day, so yesterday's 9am is the main reference for today's 9am.
+HALF_LIFE_DAYS = 14
+DECAY = 0.5 ** (1 / HALF_LIFE_DAYS)
+MIN_WEIGHT = 5.0        # effective observations before a baseline may raise alerts
+Z_THRESHOLD = 4.0
+MIN_RIDES = 5           # rate / value metrics need this many rides in the bucket to be judged
+
+METRICS = ["rides", "cancel_rate", "avg_value"]
+STATE_KEYS = ["metric", "pickup_location", "hour"]
+STATE_COLUMNS = ["weight", "s1", "s2", "day"]
+BUCKET_KEYS = ["day", "pickup_location", "hour"]
+BUCKET_COLUMNS = ["rides", "cancelled", "valued", "value_sum"]
+ALERT_COLUMNS = ["day", "pickup_location", "hour", "metric", "value", "expected", "z"]
+
+# --------------------------------
+# MERGEABLE STATE
+# --------------------------------
+def empty_state():
+    index = pd.MultiIndex.from_tuples([], names=STATE_KEYS)
+    return pd.DataFrame({c: pd.Series(dtype="float64") for c in STATE_COLUMNS}, index=index)
+
+
+def decay_to(state, day):
+    # Exponentially decayed moments (weight, sum, sum of squares) anchored at state["day"].
+    factor = DECAY ** (day - state["day"])
+    return state[["weight", "s1", "s2"]].mul(factor, axis=0)
+
+
+def merge_states(a, b):
+    """Combine two workers' states: re-anchor both at the later day, then add. Order-independent."""
+    index = a.index.union(b.index)
+    a = a.reindex(index)
+    b = b.reindex(index)
+    day = np.fmax(a["day"], b["day"])
+    moments = decay_to(a, day).fillna(0) + decay_to(b, day).fillna(0)
+    return moments.assign(day=day)
+
+def no_alerts():
+    return pd.DataFrame(columns=ALERT_COLUMNS)
+
+# --------------------------------
+# INGESTION
+# --------------------------------
+def bucketize(chunk):
+    # Hourly buckets per pickup location, plus one "all" location.
+    chunk = chunk.dropna(subset=["Date", "Time"])
+    status = chunk["Booking Status"].fillna("")
+    value = pd.to_numeric(chunk["Booking Value"], errors="coerce")
+    frame = pd.DataFrame({
+        "day": pd.to_datetime(chunk["Date"]).to_numpy().astype("datetime64[D]").astype("int64"),
+        "hour": pd.to_numeric(chunk["Time"].str[:2], errors="coerce"),
+        "pickup_location": chunk["Pickup Location"].fillna("Unknown"),
+        "rides": 1,
+        "cancelled": status.str.startswith("Cancelled").astype("int64"),
+        "valued": value.notna().astype("int64"),
+        "value_sum": value.fillna(0.0),
+    }).dropna(subset=["hour"])
+    per_location = frame.groupby(BUCKET_KEYS)[BUCKET_COLUMNS].sum()
+    overall = frame.assign(pickup_location=ALL_LOCATIONS).groupby(BUCKET_KEYS)[BUCKET_COLUMNS].sum()
+    return pd.concat([per_location, overall])
+
+
+def read_buckets(path):
+    usecols = ["Date", "Time", "Booking Status", "Pickup Location", "Booking Value"]
+    parts = [bucketize(chunk) for chunk in pd.read_csv(path, usecols=usecols, na_values=NULL_TOKENS,
+                                                       dtype=str, chunksize=CHUNK_ROWS)]
+    if not parts:
+        return bucketize(pd.DataFrame(columns=usecols))
+    return pd.concat(parts).groupby(level=[0, 1, 2]).sum()
+
+
+def variance_floor(metric, mean, rides):
+    # Keep tiny-sample baselines from producing huge z-scores on noise alone.
+    if metric == "rides":
+        return np.fmax(mean, 1.0)                                 # Poisson
+    n = np.fmax(rides, 1.0)
+    if metric == "cancel_rate":
+        return np.fmax(mean * (1 - mean), 0.01) / n               # binomial
+    return (0.05 * mean) ** 2 / n
+
+
+def detect(buckets, state):
+    """Walk the batch day by day: score each bucket against its baseline, then fold the day in."""
+    # Dense (metric, location, hour) arrays for the walk; the DataFrame form is only for storage/merge.
+    locations = pd.Index(state.index.get_level_values("pickup_location")).union(buckets.index.get_level_values("pickup_location")).unique()
+    shape = (len(METRICS), len(locations), 24)
+    dense = {c: np.full(shape, np.nan) for c in STATE_COLUMNS}
+    if not state.empty:
+        m = pd.Index(METRICS).get_indexer(state.index.get_level_values("metric"))
+        z = locations.get_indexer(state.index.get_level_values("pickup_location"))
+        h = state.index.get_level_values("hour").astype("int64")
+        for c in STATE_COLUMNS:
+            dense[c][m, z, h] = state[c].to_numpy()
+
+    alerts = []
+    for day, day_buckets in buckets.groupby(level="day"):
+        z = locations.get_indexer(day_buckets.index.get_level_values("pickup_location"))
+        h = day_buckets.index.get_level_values("hour").astype("int64")
+        counts = {}
+        for c in ["rides", "cancelled", "valued", "value_sum"]:
+            counts[c] = np.zeros(shape[1:])
+            counts[c][z, h] = day_buckets[c].to_numpy()
+        rides = counts["rides"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Ride counts are zero-filled for every location/hour seen before; rates need enough rides.
+            observed = {
+                "rides": np.where((rides > 0) | ~np.isnan(dense["day"][0]), rides, np.nan),
+                "cancel_rate": np.where(rides >= MIN_RIDES, counts["cancelled"] / rides, np.nan),
+                "avg_value": np.where(counts["valued"] >= MIN_RIDES, counts["value_sum"] / counts["valued"], np.nan),
+            }
+            for i, metric in enumerate(METRICS):
+                x = observed[metric]
+                seen = ~np.isnan(x)
+                factor = np.where(np.isnan(dense["day"][i]), 0.0, DECAY ** (day - dense["day"][i]))
+                w, s1, s2 = (np.nan_to_num(dense[c][i]) * factor for c in ("weight", "s1", "s2"))
+                mean = s1 / w
+                var = np.fmax(s2 / w - mean ** 2, 0.0)
+                score = (x - mean) / np.sqrt(np.fmax(var, variance_floor(metric, mean, rides)))
+                flagged = seen & (w >= MIN_WEIGHT) & (np.abs(score) >= Z_THRESHOLD)
+                if metric == "rides":
+                    # Sparse location-hours (a ride or two a day) are Poisson noise, not demand signals.
+                    flagged &= mean >= MIN_RIDES
+                if flagged.any():
+                    fz, fh = np.nonzero(flagged)
+                    alerts.append(pd.DataFrame({
+                        "day": day, "pickup_location": locations[fz], "hour": fh, "metric": metric,
+                        "value": x[flagged], "expected": mean[flagged], "z": score[flagged],
+                    }))
+                dense["weight"][i] = np.where(seen, w + 1, dense["weight"][i])
+                dense["s1"][i] = np.where(seen, s1 + np.nan_to_num(x), dense["s1"][i])
+                dense["s2"][i] = np.where(seen, s2 + np.nan_to_num(x) ** 2, dense["s2"][i])
+                dense["day"][i] = np.where(seen, day, dense["day"][i])
+
+    present = ~np.isnan(dense["day"])
+    m, z, h = np.nonzero(present)
+    index = pd.MultiIndex.from_arrays([np.asarray(METRICS, dtype=object)[m], locations[z], h], names=STATE_KEYS)
+    state = pd.DataFrame({c: dense[c][present] for c in STATE_COLUMNS}, index=index)
+    if not alerts:
+        return state, no_alerts()
+    return state, pd.concat(alerts, ignore_index=True)
+
+
+def advance(buckets, state, pending):
+    """Fold every day before the newest into the baselines; score the newest but keep it open.
+
+    Each input holds everything received so far for the days it covers (the cumulative export,
+    or a merged month partition), so an open day seen again is replaced, not added to. Days
+    already folded in are left alone. Returns (state, pending, alerts, rides skipped).
+    """
+    days = buckets.index.get_level_values("day")
+    folded = days <= watermark(state)
+    skipped = int(buckets.loc[folded & (buckets.index.get_level_values("pickup_location") == ALL_LOCATIONS), "rides"].sum())
+    fresh = buckets[~folded]
+    pending = pending[~pending.index.get_level_values("day").isin(fresh.index.get_level_values("day"))]
+    batch = pd.concat([pending, fresh]).sort_index()
+    if batch.empty:
+        return state, batch, no_alerts(), skipped
+    newest = batch.index.get_level_values("day") == batch.index.get_level_values("day").max()
+    state, alerts = detect(batch[~newest], state)
+    # The open day is judged against the baselines it will later be folded into, but only for
+    # hours before the newest one it has: later hours haven't been exported yet.
+    _, open_alerts = detect(batch[newest], state)
+    open_alerts = open_alerts[open_alerts["hour"] < batch[newest].index.get_level_values("hour").max()]
+    parts = [a for a in (alerts, open_alerts) if not a.empty]
+    alerts = pd.concat(parts, ignore_index=True) if parts else no_alerts()
+    return state, batch[newest], alerts, skipped
+
+# --------------------------------
+# STORAGE
+# --------------------------------
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS anomaly_state (
+    metric TEXT,
+    pickup_location TEXT,
+    hour INTEGER,
+    weight REAL,
+    s1 REAL,
+    s2 REAL,
+    day INTEGER,
+    PRIMARY KEY (metric, pickup_location, hour)
+) WITHOUT ROWID;
+
+-- Raw hourly counts of the newest day, folded into anomaly_state once a later day arrives
+CREATE TABLE IF NOT EXISTS anomaly_pending (
+    day INTEGER,
+    pickup_location TEXT,
+    hour INTEGER,
+    rides INTEGER,
+    cancelled INTEGER,
+    valued INTEGER,
+    value_sum REAL,
+    PRIMARY KEY (day, pickup_location, hour)
+) WITHOUT ROWID;
+"""
+
+ALERTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS anomalies (
+    date TEXT,
+    hour INTEGER,
+    pickup_location TEXT,
+    metric TEXT,
+    value REAL,
+    expected REAL,
+    z REAL,
+    detected_at TEXT,
+    PRIMARY KEY (date, hour, pickup_location, metric)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_anomalies_metric ON anomalies (metric, pickup_location, date);
+"""
+
+
+def read_state(conn):
+    """(baselines, open day's buckets) from a store; creates the tables on first use."""
+    conn.executescript(STATE_SCHEMA + ALERTS_SCHEMA)
+    state = pd.read_sql("SELECT * FROM anomaly_state", conn)
+    state = empty_state() if state.empty else state.astype({"day": "float64"}).set_index(STATE_KEYS)
+    pending = pd.read_sql("SELECT * FROM anomaly_pending", conn).set_index(BUCKET_KEYS)
+    return state, pending
+
+
+def to_date(days):
+    return pd.to_datetime(pd.Series(days, dtype="int64"), unit="D").dt.strftime("%Y-%m-%d")
+
+
+def write_state(conn, state, pending, alerts, rescored):
+    # Alerts of every day scored this run are rewritten: an open day's may change once it fills up.
+    alerts = alerts.assign(
+        date=to_date(alerts["day"].astype("int64")).to_numpy(),
+        detected_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    )
+    with conn:
+        conn.execute("DELETE FROM anomaly_state")
+        conn.executemany(
+            "INSERT INTO anomaly_state VALUES (?, ?, ?, ?, ?, ?, ?)",
+            state.reset_index().astype({"hour": "int64", "day": "int64"})[STATE_KEYS + STATE_COLUMNS].itertuples(index=False)
+        )
+        conn.execute("DELETE FROM anomaly_pending")
+        conn.executemany(
+            "INSERT INTO anomaly_pending VALUES (?, ?, ?, ?, ?, ?, ?)",
+            pending.reset_index().astype({"day": "int64", "hour": "int64"})[BUCKET_KEYS + BUCKET_COLUMNS].itertuples(index=False)
+        )
+        conn.executemany("DELETE FROM anomalies WHERE date = ?", [(d,) for d in to_date(sorted(set(rescored)))])
+        conn.executemany(
+            "INSERT OR REPLACE INTO anomalies VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            alerts[["date", "hour", "pickup_location", "metric", "value", "expected", "z", "detected_at"]]
+            .astype({"hour": "int64"}).itertuples(index=False)
+        )
+
+
+def watermark(state):
+    return int(state["day"].max()) if not state.empty else -1
+
+
+def export_alerts(store, db, month):
+    """Copy one month's alerts from a city's state store into its (rebuilt) partition DB."""
+    conn = sqlite3.connect(db)
+    try:
+        conn.executescript(ALERTS_SCHEMA)
+        conn.execute("ATTACH DATABASE ? AS store", (store,))
+        with conn:
+            conn.execute("DELETE FROM anomalies WHERE substr(date, 1, 7) = ?", (month,))
+            conn.execute("INSERT INTO anomalies SELECT * FROM store.anomalies WHERE substr(date, 1, 7) = ?", (month,))
+        return conn.execute("SELECT count(*) FROM anomalies WHERE substr(date, 1, 7) = ?", (month,)).fetchone()[0]
+    finally:
+        conn.close()
+
+# --------------------------------
+# CLI
+# --------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Streaming anomaly detection over ingested booking batches")
+    sub = parser.add_subparsers(dest="command", required=True)
+    d = sub.add_parser("detect", help="score a cleaned CSV batch and fold it into the baselines")
+    d.add_argument("csv")
+    d.add_argument("db")
+    m = sub.add_parser("merge", help="merge other workers' baseline state into db")
+    m.add_argument("db")
+    m.add_argument("others", nargs="+")
+    e = sub.add_parser("export", help="copy one month's alerts from a state store into a partition DB")
+    e.add_argument("store")
+    e.add_argument("db")
+    e.add_argument("--month", required=True, help="YYYY-MM")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        count = export_alerts(args.store, args.db, args.month)
+        print(f"[INFO] Anomalies: {count} alert(s) for {args.month} → {args.db}")
+        return
+
+    conn = sqlite3.connect(args.db)
+    state, pending = read_state(conn)
+    started = time.perf_counter()
+    if args.command == "merge":
+        # Workers see disjoint bookings, so their open-day counts add up.
+        for path in args.others:
+            other = sqlite3.connect(path)
+            other_state, other_pending = read_state(other)
+            other.close()
+            state = merge_states(state, other_state)
+            pending = pd.concat([pending, other_pending]).groupby(level=[0, 1, 2]).sum()
+        buckets, pending = pending, pending.iloc[:0]
+    else:
+        buckets = read_buckets(args.csv)
+    days = pd.concat([pending, buckets]).index.get_level_values("day").unique()
+    rescored = days[days > watermark(state)]
+    state, pending, alerts, skipped = advance(buckets, state, pending)
+    write_state(conn, state, pending, alerts, rescored)
+    conn.close()
+    open_day = to_date(pending.index.get_level_values("day")[:1]).tolist() or ["none"]
+    print(f"[INFO] Anomalies: {len(alerts)} flagged, {len(state)} baselines, open day {open_day[0]}, "
+          f"{skipped:,} ride(s) on days already folded in skipped, {time.perf_counter() - started:.2f}s → {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import contextlib
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import queries
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+POOL_SIZE = int(os.environ.get("API_POOL_SIZE", "8"))
+CACHE_ENTRIES = int(os.environ.get("API_CACHE_ENTRIES", "1024"))
+
+FILTERS = {
+    # query param -> (table, column) used for the "everything" default, as in the sidebar
+    "status": ("ride_status_distribution", "status"),
+    "vehicle": ("vehicle_demand", "vehicle_type"),
+    "pickup": ("top_pickup_locations", "location"),
+    "drop": ("top_drop_locations", "location"),
+    "payment": ("payment_methods", "method"),
+}
+
+# --------------------------------
+# READ-ONLY CONNECTION POOL
+# --------------------------------
+class ReadOnlyPool:
+    # At most `size` connections are checked out at once (further requests wait for one) and
+    # at most `size` idle ones are kept per DB.
+    def __init__(self, size):
+        self.size = size
+        self.generation = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _checkout(self, path):
+        with self._lock:
+            idle = self._idle.setdefault(path, [])
+            conn = idle.pop() if idle else None
+            generation = self.generation
+        if conn is None:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+        return conn, generation
+
+    def _checkin(self, path, conn, generation):
+        with self._lock:
+            # A handle from before clear() points at a replaced DB file: close it, don't pool it.
+            idle = self._idle.setdefault(path, [])
+            if generation == self.generation and len(idle) < self.size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    @contextlib.contextmanager
+    def connection(self, path):
+        with self._slots:
+            conn, generation = self._checkout(path)
+            try:
+                yield conn
+            finally:
+                self._checkin(path, conn, generation)
+
+    def clear(self):
+        # The pipeline replaces DB files wholesale, so pooled handles must not outlive a version.
+        with self._lock:
+            self.generation += 1
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+pool = ReadOnlyPool(POOL_SIZE)
+queries.set_pool(pool)
+
+# --------------------------------
+# VERSIONED RESPONSE CACHE
+# --------------------------------
+class ResponseCache:
+    def __init__(self, entries):
+        self.entries = entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = None
+
+    def get(self, key):
+        with self._lock:
+            body = self._data.get(key)
+            if body is not None:
+                self._data.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._data[key] = body
+            if len(self._data) > self.entries:
+                self._data.popitem(last=False)
+
+    def set_version(self, version):
+        with self._lock:
+            if version == self.version:
+                return False
+            self.version = version
+            self._data.clear()
+            return True
+
+
+cache = ResponseCache(CACHE_ENTRIES)
+
+
+def data_version():
+    # Rebuilding the main DB or (re)registering any partition touches one of these two files.
+    parts = []
+    for path in (queries.DB_PATH, queries.CATALOG_PATH):
+        if os.path.exists(path):
+            st = os.stat(path)
+            parts.append(f"{path}:{st.st_mtime_ns}:{st.st_size}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+# --------------------------------
+# FILTERS
+# --------------------------------
+class BadRequest(Exception):
+    pass
+
+
+def param_list(params, name):
+    values = [v for raw in params.getlist(name) for v in raw.split(",") if v]
+    return values or None
+
+
+def resolve_sources(args):
+    catalog = queries.read_catalog()
+    if catalog.empty:
+        return (queries.DB_PATH,)
+    cities = catalog["city"].unique().tolist()
+    city = args.get("city", cities[0])
+    months = catalog.loc[catalog["city"] == city, "month"]
+    if months.empty:
+        raise BadRequest(f"unknown city: {city}")
+    dbs, _ = queries.select_partitions(
+        city, args.get("from_month", months.min()), args.get("to_month", months.max())
+    )
+    if not dbs:
+        raise BadRequest("no partitions in the requested month range")
+    return dbs
+
+
+def resolve_filters(explicit, dbs):
+    filters = {}
+    for name, (table, column) in FILTERS.items():
+        filters[name] = explicit[name] or queries.distinct(dbs, column, table)
+    return filters
+
+# --------------------------------
+# ENDPOINTS
+# --------------------------------
+def kpis(dbs, f, explicit, args):
+    return queries.kpis(dbs)
+
+
+def distribution(dbs, f, explicit, args):
+    kind = args["kind"]
+    if kind == "status":
+        return queries.ride_status(dbs, f["status"])
+    if kind == "vehicle":
+        return queries.vehicle_demand(dbs, f["vehicle"])
+    if kind == "payment":
+        return queries.payment_methods(dbs, f["payment"])
+    if kind == "cancellations":
+        return queries.cancellations(dbs)
+    raise BadRequest(f"unknown distribution: {kind}")
+
+
+def top_locations(dbs, f, explicit, args):
+    kind = args["kind"]
+    if kind == "pickup":
+        return queries.top_pickups(dbs, f["pickup"])
+    if kind == "drop":
+        return queries.top_drops(dbs, f["drop"])
+    raise BadRequest(f"unknown location kind: {kind}")
+
+
+def revenue(dbs, f, explicit, args):
+    segment = args["segment"]
+    if segment not in ("all", "status", "vehicle", "payment", "pickup_location", "day"):
+        raise BadRequest(f"unknown revenue segment: {segment}")
+    return queries.revenue(dbs, segment)
+
+
+def anomalies(dbs, f, explicit, args):
+    try:
+        limit = int(args.get("limit", "200"))
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+    return queries.anomalies(dbs, limit)
+
+
+def timeseries(dbs, f, explicit, args):
+    return queries.daily_rides(dbs, f["status"], f["vehicle"])
+
+
+def od_pairs(dbs, f, explicit, args):
+    try:
+        limit = int(args.get("limit", "50"))
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+    # Pickup/drop only narrow OD pairs when given explicitly; the defaults are just the top-5 lists.
+    return queries.od_pairs(
+        dbs, f["status"], f["vehicle"], explicit["pickup"], explicit["drop"], limit
+    )
+
+
+REQUIRED_TABLES = {
+    anomalies: "anomalies",
+    revenue: "revenue_segments",
+    timeseries: "daily_rides",
+    od_pairs: "od_pairs",
+}
+
+
+def build_body(handler, args, explicit, version):
+    dbs = resolve_sources(args)
+    table = REQUIRED_TABLES.get(handler)
+    if table and not queries.has_table(table, dbs[0]):
+        raise BadRequest(f"{table} not built yet; rerun uber_analytics_sqlite.sh")
+    df = handler(dbs, resolve_filters(explicit, dbs), explicit, args)
+    return f'{{"version": "{version}", "data": {df.to_json(orient="records")}}}'.encode()
+
+
+def route(handler):
+    async def endpoint(request):
+        version = data_version()
+        if cache.set_version(version):
+            pool.clear()
+        query = sorted(request.query_params.multi_items())
+        key = (version, request.url.path, tuple(query))
+        etag = '"' + hashlib.sha1(repr(key).encode()).hexdigest()[:20] + '"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        body = cache.get(key)
+        if body is None:
+            args = {**request.query_params, **request.path_params}
+            explicit = {name: param_list(request.query_params, name) for name in FILTERS}
+            try:
+                body = await run_in_threadpool(build_body, handler, args, explicit, version)
+            except BadRequest as e:
+                return JSONResponse({"error": str(e)}, status_code=400)
+            cache.put(key, body)
+        return Response(body, media_type="application/json",
+                        headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return endpoint
+
+
+async def version(request):
+    return JSONResponse({"version": data_version()})
+
+
+app = Starlette(routes=[
+    Route("/api/version", version),
+    Route("/api/kpis", route(kpis)),
+    Route("/api/distributions/{kind}", route(distribution)),
+    Route("/api/locations/{kind}", route(top_locations)),
+    Route("/api/revenue/{segment}", route(revenue)),
+    Route("/api/anomalies", route(anomalies)),
+    Route("/api/timeseries/daily", route(timeseries)),
+    Route("/api/od-pairs", route(od_pairs)),
+])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless JSON API over the analytics DB")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+DEFAULT_PATHS = [
+    "/api/kpis",
+    "/api/distributions/status",
+    "/api/distributions/vehicle?vehicle=Auto,Bike",
+    "/api/distributions/payment",
+    "/api/distributions/cancellations",
+    "/api/locations/pickup",
+    "/api/locations/drop",
+    "/api/revenue/vehicle",
+    "/api/timeseries/daily?status=Completed",
+    "/api/od-pairs?limit=20",
+]
+
+# --------------------------------
+# MINIMAL KEEP-ALIVE HTTP CLIENT
+# --------------------------------
+async def request(reader, writer, host, path, etag=None):
+    headers = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+    if etag:
+        headers += f"If-None-Match: {etag}\r\n"
+    writer.write((headers + "\r\n").encode())
+    await writer.drain()
+
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length, response_etag = 0, None
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+        elif name.lower() == "etag":
+            response_etag = value.strip()
+    if length:
+        await reader.readexactly(length)
+    return status, response_etag
+
+
+async def worker(host, port, paths, deadline, revalidate, latencies, statuses, offset):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        status, etag = await request(reader, writer, f"{host}:{port}", path,
+                                     etags.get(path) if revalidate else None)
+        latencies.append(time.perf_counter() - started)
+        statuses[status] += 1
+        if etag:
+            etags[path] = etag
+    writer.close()
+
+
+async def run(url, concurrency, duration, revalidate, paths):
+    parts = urlsplit(url)
+    latencies, statuses = [], Counter()
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        worker(parts.hostname, parts.port or 80, paths, deadline, revalidate, latencies, statuses, n)
+        for n in range(concurrency)
+    ])
+    return latencies, statuses, time.perf_counter() - started
+
+# --------------------------------
+# REPORT
+# --------------------------------
+def percentile(sorted_values, p):
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test a running api.py instance")
+    parser.add_argument("--url", default="http://127.0.0.1:8600")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--revalidate", action="store_true",
+                        help="send If-None-Match with the last ETag seen per path")
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="endpoint to hit (repeatable); defaults to every endpoint")
+    args = parser.parse_args()
+
+    latencies, statuses, elapsed = asyncio.run(
+        run(args.url, args.concurrency, args.duration, args.revalidate, args.paths or DEFAULT_PATHS)
+    )
+    if not latencies:
+        raise SystemExit("[ERROR] no requests completed")
+    ms = sorted(x * 1000 for x in latencies)
+    print(f"requests     {len(ms):,} in {elapsed:.1f}s with {args.concurrency} connections")
+    print(f"throughput   {len(ms) / elapsed:,.0f} req/s")
+    print(f"latency ms   mean {statistics.fmean(ms):.2f}  p50 {percentile(ms, 50):.2f}  "
+          f"p95 {percentile(ms, 95):.2f}  p99 {percentile(ms, 99):.2f}  max {ms[-1]:.2f}")
+    print("statuses     " + "  ".join(f"{code}: {n:,}" for code, n in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from queries import BOOKING_COLUMNS
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+CHUNK_ROWS = 1_000_000
+
+LOCATIONS = [
+    "Khandsa", "Barakhamba Road", "Saket", "Badarpur", "Pragati Maidan", "Cyber Hub",
+    "Noida Sector 62", "Dwarka Sector 21", "Gurgaon Sector 56", "Indirapuram",
+    "Rajouri Garden", "Hauz Khas", "Connaught Place", "Lajpat Nagar", "Karol Bagh",
+    "Vasant Kunj", "Janakpuri", "Rohini", "Mayur Vihar", "Okhla",
+]
+VEHICLES = ["Auto", "Go Mini", "Go Sedan", "Bike", "Premier Sedan", "eBike", "Uber XL"]
+PAYMENTS = ["UPI", "Cash", "Uber Wallet", "Credit Card", "Debit Card"]
+STATUSES = ["Completed", "Cancelled by Driver", "Cancelled by Customer", "Incomplete", "No Driver Found"]
+STATUS_WEIGHTS = [0.62, 0.18, 0.07, 0.06, 0.07]
+CUSTOMER_REASONS = [
+    "Driver is not moving towards pickup location", "Driver asked to cancel",
+    "AC is not working", "Change of plans", "Wrong Address",
+]
+DRIVER_REASONS = [
+    "Personal & Car related issues", "Customer related issue",
+    "The customer was coughing/sick", "More than permitted people in there",
+]
+INCOMPLETE_REASONS = ["Vehicle Breakdown", "Other Issue", "Customer Demand"]
+
+# --------------------------------
+# GENERATOR
+# --------------------------------
+def _pick(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+
+def _fmt(values, decimals, mask):
+    # Format only where the column applies; everything else is the literal "null" the cleaner emits.
+    out = np.full(len(values), "null", dtype=object)
+    out[mask] = np.round(values[mask], decimals).astype(str)
+    return out
+
+
+def chunk(rng, start, n, year=2024):
+    status_idx = rng.choice(len(STATUSES), n, p=STATUS_WEIGHTS)
+    status = np.asarray(STATUSES, dtype=object)[status_idx]
+    completed = status_idx == 0
+    by_driver = status_idx == 1
+    by_customer = status_idx == 2
+    incomplete = status_idx == 3
+    paid = completed | incomplete
+
+    # Few distinct dates/times: format each once and index, rather than strftime per row.
+    days = pd.date_range(f"{year}-01-01", f"{year}-12-31").strftime("%Y-%m-%d").to_numpy(dtype=object)
+    times = pd.to_datetime(np.arange(86_400), unit="s").strftime("%H:%M:%S").to_numpy(dtype=object)
+    null = np.full(n, "null", dtype=object)
+
+    def reason(values, mask):
+        out = null.copy()
+        out[mask] = _pick(rng, values, mask.sum())
+        return out
+
+    def flag(mask):
+        return np.where(mask, "1", "null").astype(object)
+
+    payment = null.copy()
+    payment[paid] = _pick(rng, PAYMENTS, paid.sum())
+    return pd.DataFrame({
+        "Date": days[rng.integers(0, len(days), n)],
+        "Time": times[rng.integers(0, len(times), n)],
+        "Booking ID": "CNR" + pd.Series(np.arange(10_000_000 + start, 10_000_000 + start + n)).astype(str),
+        "Booking Status": status,
+        "Customer ID": "CID" + pd.Series(rng.integers(1_000_000, 9_999_999, n)).astype(str),
+        "Vehicle Type": _pick(rng, VEHICLES, n),
+        "Pickup Location": _pick(rng, LOCATIONS, n),
+        "Drop Location": _pick(rng, LOCATIONS, n),
+        "Avg VTAT": _fmt(rng.uniform(2, 20, n), 1, status_idx != 4),
+        "Avg CTAT": _fmt(rng.uniform(10, 45, n), 1, paid),
+        "Cancelled Rides by Customer": flag(by_customer),
+        "Reason for cancelling by Customer": reason(CUSTOMER_REASONS, by_customer),
+        "Cancelled Rides by Driver": flag(by_driver),
+        "Driver Cancellation Reason": reason(DRIVER_REASONS, by_driver),
+        "Incomplete Rides": flag(incomplete),
+        "Incomplete Rides Reason": reason(INCOMPLETE_REASONS, incomplete),
+        "Booking Value": _fmt(rng.integers(50, 4000, n), 0, paid),
+        "Ride Distance": _fmt(rng.uniform(1, 50, n), 2, paid),
+        "Driver Ratings": _fmt(rng.uniform(3, 5, n), 1, completed),
+        "Customer Rating": _fmt(rng.uniform(3, 5, n), 1, completed),
+        "Payment Method": payment,
+    }, columns=BOOKING_COLUMNS)
+
+
+def generate(rows, out, seed=1):
+    # Same layout as uber_clean.sh output (CRLF, "null" for missing) so every pipeline can read it.
+    rng = np.random.default_rng(seed)
+    with open(out, "w", newline="") as f:
+        f.write(",".join(BOOKING_COLUMNS) + "\r\n")
+        for start in range(0, rows, CHUNK_ROWS):
+            n = min(CHUNK_ROWS, rows - start)
+            chunk(rng, start, n).to_csv(f, header=False, index=False, lineterminator="\r\n")
+    return out
+
+# --------------------------------
+# CLI
+# --------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic cleaned bookings CSV for benchmarks")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("out")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--parquet", action="store_true", help="also write <out>.parquet for the DuckDB engine")
+    args = parser.parse_args()
+
+    generate(args.rows, args.out, args.seed)
+    print(f"[INFO] Wrote {args.rows:,} rows to {args.out}")
+    if args.parquet:
+        import duck_queries
+
+        print(f"[INFO] Wrote {duck_queries.to_parquet(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+# Only 1M rows has been measured; larger sizes can be passed with --sizes.
+DEFAULT_SIZES = "1000000"
+ENGINES = ["sqlite", "duckdb-csv", "duckdb-parquet"]
+
+# --------------------------------
+# WORKLOAD (the dashboard's query set, same calls for every engine)
+# --------------------------------
+def workload(engine, sources):
+    statuses = engine.distinct(sources, "status", "ride_status_distribution")
+    vehicles = engine.distinct(sources, "vehicle_type", "vehicle_demand")
+    pickups = engine.distinct(sources, "location", "top_pickup_locations")
+    methods = engine.distinct(sources, "method", "payment_methods")
+    return {
+        "kpis": lambda: engine.kpis(sources),
+        "ride_status": lambda: engine.ride_status(sources, statuses),
+        "vehicle_demand": lambda: engine.vehicle_demand(sources, vehicles),
+        "top_pickups": lambda: engine.top_pickups(sources, pickups),
+        "payment_methods": lambda: engine.payment_methods(sources, methods),
+        "cancellations": lambda: engine.cancellations(sources),
+        "cancellation_reasons": lambda: engine.cancellation_reasons(sources, "Customer", vehicles),
+        "daily_rides": lambda: engine.daily_rides(sources, statuses[:1], vehicles),
+        "od_pairs": lambda: engine.od_pairs(sources, statuses, vehicles),
+    }
+
+
+def prepare(name, csv, workdir):
+    # Returns (engine module, sources, seconds spent getting the data queryable).
+    started = time.perf_counter()
+    if name == "sqlite":
+        import queries
+
+        db = os.path.join(workdir, os.path.basename(csv) + ".db")
+        # Keep the pipeline's shared-dataset publish out of the dashboard's ./shared.
+        env = {**os.environ, "SHARED_DATASET_DIR": os.path.join(workdir, "shared")}
+        subprocess.run(["bash", "uber_analytics_sqlite.sh", csv, db], check=True, stdout=subprocess.DEVNULL, env=env)
+        return queries, (db,), time.perf_counter() - started
+
+    import duck_queries
+
+    if name == "duckdb-parquet":
+        # Conversion is this engine's one-off ingest cost, the analogue of building the SQLite tables.
+        # Not named <stem>.parquet, or source() would silently pick it up for the CSV engine too.
+        return duck_queries, (duck_queries.to_parquet(csv, csv + ".parquet"),), time.perf_counter() - started
+    return duck_queries, (csv,), 0.0
+
+
+def run_child(name, csv, workdir, repeat):
+    engine, sources, load_s = prepare(name, csv, workdir)
+    timings = {}
+    for query, fn in workload(engine, sources).items():
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - started)
+        timings[query] = statistics.median(runs)
+    # ru_maxrss is KiB on Linux; RUSAGE_CHILDREN picks up the sqlite3/awk pipeline.
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    print(json.dumps({"load_s": load_s, "queries": timings, "peak_rss_mb": peak / 1024}))
+
+# --------------------------------
+# DRIVER
+# --------------------------------
+def dataset(rows, workdir):
+    csv = os.path.join(workdir, f"bookings_{rows}.csv")
+    if not os.path.exists(csv):
+        # Out of process: Linux carries ru_maxrss across fork/exec, so a driver that had
+        # generated the data itself would leak its peak into every engine's measurement.
+        subprocess.run([sys.executable, "bench_data.py", str(rows), csv], check=True)
+    return csv
+
+
+def measure(name, csv, workdir, repeat):
+    # One process per engine so peak RSS and caches belong to that engine alone.
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", name, csv, "--workdir", workdir, "--repeat", str(repeat)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def report(rows, name, result):
+    total = sum(result["queries"].values())
+    slowest = max(result["queries"], key=result["queries"].get)
+    print(f"{rows:>12,}  {name:<15} load {result['load_s']:>8.2f}s  "
+          f"queries {total * 1000:>9.1f}ms  slowest {slowest} {result['queries'][slowest] * 1000:.1f}ms  "
+          f"peak RSS {result['peak_rss_mb']:>7.0f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite and DuckDB query engines on synthetic data")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts")
+    parser.add_argument("--engines", default=",".join(ENGINES))
+    parser.add_argument("--workdir", default="bench")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="also write raw results here")
+    parser.add_argument("--child", nargs=2, metavar=("ENGINE", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child, args.workdir, args.repeat)
+        return
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    for rows in (int(s) for s in args.sizes.split(",")):
+        csv = dataset(rows, args.workdir)
+        for name in args.engines.split(","):
+            try:
+                result = measure(name, csv, args.workdir, args.repeat)
+            except subprocess.CalledProcessError as e:
+                print(f"{rows:>12,}  {name:<15} FAILED (exit {e.returncode})")
+                continue
+            report(rows, name, result)
+            results.append({"rows": rows, "engine": name, **result})
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import ctypes
+import gc
+import multiprocessing as mp
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+
+import frame_queries
+import shared_dataset
+from bench_query_engines import dataset
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+DEFAULT_PROCESSES = "1,2,4,8"
+MODES = ["shared", "private"]
+# Each extra process may add at most this fraction of the dataset before "shared" counts as growing.
+MAX_GROWTH = 0.15
+
+# --------------------------------
+# WORKER (one dashboard server process)
+# --------------------------------
+def memory():
+    # PSS splits shared pages between the processes mapping them, so it sums to real usage;
+    # RSS counts a shared page once per process. Values are KiB.
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {"rss": fields["Rss"], "pss": fields["Pss"]}
+
+
+def touch(df):
+    # The raw-frame charts of the dashboard, so the columns they read are resident.
+    frame_queries.status_counts(df)
+    frame_queries.rides_by(df, "Date")
+    frame_queries.rides_by(df, "Hour")
+    frame_queries.booking_value_box(df)
+    frame_queries.od_counts(df)
+    frame_queries.rating_histogram(df, "Driver Ratings")
+
+
+def settle():
+    # Hand query temporaries back to the OS so only what the process keeps is counted.
+    gc.collect()
+    pa.default_memory_pool().release_unused()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def worker(mode, csv, root, barrier, results):
+    before = memory()
+    barrier.wait()
+    if mode == "shared":
+        df = shared_dataset.latest(csv, root)
+    else:
+        # What every server process does today: its own parsed, typed copy.
+        df = shared_dataset.prepare(pd.read_csv(csv))
+    touch(df)
+    settle()
+    barrier.wait()
+    # Measured while every worker still holds its frame, so shared pages are split N ways.
+    results.put((before, memory()))
+    barrier.wait()
+
+# --------------------------------
+# DRIVER
+# --------------------------------
+def measure(mode, n, csv, root):
+    # spawn, not fork: no worker may inherit pages from the driver.
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, csv, root, barrier, results)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    samples = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    total = {k: sum(after[k] for _, after in samples) / 1024 for k in ("rss", "pss")}
+    total["data_pss"] = sum(after["pss"] - before["pss"] for before, after in samples) / 1024
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Total memory of N dashboard processes: shared mapping vs private copies")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--processes", default=DEFAULT_PROCESSES, help="comma-separated process counts")
+    parser.add_argument("--workdir", default="bench")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    csv = dataset(args.rows, args.workdir)
+    root = os.path.join(args.workdir, "shared")
+    version, _ = shared_dataset.publish(csv, root)
+    size_mb = os.path.getsize(os.path.join(shared_dataset.dataset_dir(csv, root), version, shared_dataset.DATA_FILE)) / 2**20
+    print(f"[INFO] {args.rows:,} rows, shared Arrow file {size_mb:.0f}MB")
+
+    counts = [int(n) for n in args.processes.split(",")]
+    data = {}
+    for mode in MODES:
+        for n in counts:
+            total = measure(mode, n, csv, root)
+            data[mode, n] = total["data_pss"]
+            print(f"{mode:<8} {n:>3} process(es)  total RSS {total['rss']:>8.0f}MB  total PSS {total['pss']:>8.0f}MB  "
+                  f"dataset PSS {total['data_pss']:>8.0f}MB")
+
+    # Dataset memory across all processes should not grow with the process count when shared.
+    lo, hi = min(counts), max(counts)
+    growth = (data["shared", hi] - data["shared", lo]) / max(hi - lo, 1)
+    print(f"[INFO] shared: +{growth:.0f}MB per extra process "
+          f"(private: +{(data['private', hi] - data['private', lo]) / max(hi - lo, 1):.0f}MB)")
+    if growth > MAX_GROWTH * size_mb:
+        print(f"[FAIL] shared dataset memory grows with process count (> {MAX_GROWTH:.0%} of {size_mb:.0f}MB each)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+import argparse
+import math
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+INDEX_PATH = "booking_index.db"
+ID_FIELD = 2                  # 0-based position of "Booking ID" in the cleaned CSV
+# Normalized IDs that mean "no ID" (clean_rules.py writes nulls as "null"); never indexed.
+NULL_KEYS = frozenset({"", "null", "nan", "none", "na", "n/a", "-"})
+CHUNK_LINES = 100_000
+IN_BATCH = 500                # keys per "IN (...)" confirmation query
+
+# Scalable Bloom filter (Almeida et al.): each new slice doubles capacity and
+# tightens its error rate, so the compound false-positive rate stays under ERROR_RATE.
+ERROR_RATE = 0.01
+INITIAL_CAPACITY = 1_000_000
+GROWTH = 2
+TIGHTENING = 0.9
+
+HASH_KEYS = ("booking-index-h1", "booking-index-h2")
+
+SCHEMA = """
+-- digest: 64-bit hash of the cleaned row last ingested for this ID; prev_*: what the
+-- batch that last updated it replaced, restored if that batch is cleaned again
+CREATE TABLE IF NOT EXISTS booking_ids (
+    id TEXT PRIMARY KEY,
+    digest INTEGER NOT NULL,
+    batch TEXT NOT NULL,
+    prev_digest INTEGER,
+    prev_batch TEXT
+) WITHOUT ROWID;
+
+-- Slice bits live in <index>.bloom/slice-<n>.bits, memory-mapped; only metadata is here.
+CREATE TABLE IF NOT EXISTS bloom_slices (
+    slice INTEGER PRIMARY KEY,
+    capacity INTEGER NOT NULL,
+    error_rate REAL NOT NULL,
+    hashes INTEGER NOT NULL,
+    count INTEGER NOT NULL
+);
+"""
+
+# --------------------------------
+# SCALABLE BLOOM FILTER
+# --------------------------------
+def hash_pair(keys):
+    arr = np.asarray(keys, dtype=object)
+    return tuple(pd.util.hash_array(arr, hash_key=k, categorize=False) for k in HASH_KEYS)
+
+
+def row_digest(lines):
+    # Signed, so it fits an SQLite INTEGER.
+    rows = np.asarray([line.rstrip("\r\n") for line in lines], dtype=object)
+    return pd.util.hash_array(rows, categorize=False).view(np.int64)
+
+
+def slice_bytes(capacity, error_rate):
+    n_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    return (n_bits + 7) // 8
+
+
+def in_memory(slice_no, n_bytes):
+    return np.zeros(n_bytes, dtype=np.uint8)
+
+
+class BloomSlice:
+    def __init__(self, capacity, error_rate, hashes=None, count=0, bits=None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        n_bytes = slice_bytes(capacity, error_rate)
+        self.hashes = hashes or max(1, round(n_bytes * 8 / capacity * math.log(2)))
+        self.count = count
+        self.bits = in_memory(0, n_bytes) if bits is None else bits
+        self.n_bits = len(self.bits) * 8
+
+    def _positions(self, h1, h2):
+        # Kirsch-Mitzenmacher double hashing: k probes from two 64-bit hashes, one row per key.
+        i = np.arange(self.hashes, dtype=np.uint64)
+        return (h1[:, None] + i * h2[:, None]) % np.uint64(self.n_bits)
+
+    def contains(self, h1, h2):
+        pos = self._positions(h1, h2)
+        hit = self.bits[pos >> np.uint64(3)] & (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8))
+        return (hit != 0).all(axis=1)
+
+    def add(self, h1, h2):
+        pos = self._positions(h1, h2).ravel()
+        np.bitwise_or.at(self.bits, pos >> np.uint64(3), np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8))
+        self.count += len(h1)
+
+
+class ScalableBloom:
+    def __init__(self, slices=(), storage=in_memory):
+        # storage(slice_no, n_bytes) -> zeroed uint8 array for a new slice's bits.
+        self.slices = list(slices)
+        self.storage = storage
+
+    def contains(self, h1, h2):
+        maybe = np.zeros(len(h1), dtype=bool)
+        for s in self.slices:
+            maybe |= s.contains(h1, h2)
+        return maybe
+
+    def add(self, h1, h2):
+        start = 0
+        while start < len(h1):
+            if not self.slices or self.slices[-1].count >= self.slices[-1].capacity:
+                self._grow()
+            current = self.slices[-1]
+            end = start + current.capacity - current.count
+            current.add(h1[start:end], h2[start:end])
+            start = end
+
+    def _grow(self):
+        if not self.slices:
+            capacity, error_rate = INITIAL_CAPACITY, ERROR_RATE * (1 - TIGHTENING)
+        else:
+            last = self.slices[-1]
+            capacity, error_rate = last.capacity * GROWTH, last.error_rate * TIGHTENING
+        bits = self.storage(len(self.slices), slice_bytes(capacity, error_rate))
+        self.slices.append(BloomSlice(capacity, error_rate, bits=bits))
+
+    @property
+    def nbytes(self):
+        return sum(s.bits.nbytes for s in self.slices)
+
+# --------------------------------
+# PERSISTENT INDEX
+# --------------------------------
+class BookingIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        # Memory-mapped slices: the OS pages bits in on demand and writes back only dirty
+        # pages, so neither RAM nor a single write grows with the whole filter.
+        self.bloom_dir = path + ".bloom"
+        os.makedirs(self.bloom_dir, exist_ok=True)
+        self.bloom = ScalableBloom(
+            (BloomSlice(capacity, error_rate, hashes, count,
+                        self._bits(i, slice_bytes(capacity, error_rate), "r+"))
+             for i, capacity, error_rate, hashes, count in self.conn.execute(
+                 "SELECT slice, capacity, error_rate, hashes, count FROM bloom_slices ORDER BY slice"
+             )),
+            storage=lambda i, n_bytes: self._bits(i, n_bytes, "w+"),
+        )
+
+    def _bits(self, slice_no, n_bytes, mode):
+        return np.memmap(os.path.join(self.bloom_dir, f"slice-{slice_no}.bits"), dtype=np.uint8,
+                         mode=mode, shape=(n_bytes,))
+
+    def start_batch(self, batch):
+        # Batch ids name one export (uber_clean.sh uses its content hash), so a matching id
+        # means this exact export is being cleaned again: its earlier run is not history.
+        # Its Bloom bits stay set, which only costs a few extra confirmations.
+        self.conn.execute("DELETE FROM booking_ids WHERE batch = ? AND prev_batch IS NULL", (batch,))
+        self.conn.execute(
+            """UPDATE booking_ids SET digest = prev_digest, batch = prev_batch, prev_digest = NULL, prev_batch = NULL
+               WHERE batch = ?""", (batch,)
+        )
+
+    def _confirm(self, keys):
+        # Exact check for Bloom positives: {id: digest} of the ones really indexed.
+        seen = {}
+        for i in range(0, len(keys), IN_BATCH):
+            part = keys[i:i + IN_BATCH]
+            seen.update(self.conn.execute(
+                f"SELECT id, digest FROM booking_ids WHERE id IN ({','.join('?' * len(part))})", part
+            ))
+        return seen
+
+    def check_and_add(self, keys, digests, batch):
+        """Classify a chunk of rows by Booking ID. Returns two bool masks:
+
+        resent:  this exact row was ingested before, or its ID repeats earlier in the chunk (drop);
+        updated: a known ID whose row changed (keep; the partition merge replaces the old row).
+        """
+        keys = pd.Series(keys, dtype=object)
+        digests = np.asarray(digests, dtype=np.int64)
+        # Rows without an ID can't be matched to anything: never indexed, never dropped.
+        missing = keys.isin(NULL_KEYS).to_numpy()
+        repeated = keys.duplicated().to_numpy() & ~missing
+        h1, h2 = hash_pair(keys)
+        maybe = self.bloom.contains(h1, h2) & ~repeated & ~missing
+        seen = self._confirm(keys[maybe].tolist()) if maybe.any() else {}
+        known = keys.isin(seen.keys()).to_numpy() & maybe
+        same = known.copy()
+        same[known] = [seen[k] == d for k, d in zip(keys[known], digests[known].tolist())]
+        updated = known & ~same
+        new = ~(repeated | known | missing)
+
+        # Sorted inserts keep B-tree page writes local.
+        self.conn.executemany(
+            "INSERT INTO booking_ids (id, digest, batch) VALUES (?, ?, ?)",
+            sorted(zip(keys[new], digests[new].tolist(), [batch] * int(new.sum())))
+        )
+        self.conn.executemany(
+            """UPDATE booking_ids SET prev_digest = digest, prev_batch = batch, digest = ?, batch = ?
+               WHERE id = ?""",
+            zip(digests[updated].tolist(), [batch] * int(updated.sum()), keys[updated])
+        )
+        # Bloom positives already have their bits set; adding them again would only inflate slice counts.
+        self.bloom.add(h1[new & ~maybe], h2[new & ~maybe])
+        return repeated | same, updated
+
+    def save(self):
+        # Bits reach disk before the keys they cover are committed: after a crash the filter
+        # can only hold extra bits (more confirmations), never miss a committed key.
+        for s in self.bloom.slices:
+            s.bits.flush()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO bloom_slices VALUES (?, ?, ?, ?, ?)",
+            ((i, s.capacity, s.error_rate, s.hashes, s.count) for i, s in enumerate(self.bloom.slices))
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def stats(self):
+        keys = self.conn.execute("SELECT COUNT(*) FROM booking_ids").fetchone()[0]
+        batches = self.conn.execute("SELECT COUNT(DISTINCT batch) FROM booking_ids").fetchone()[0]
+        return {
+            "keys": keys,
+            "batches": batches,
+            "slices": len(self.bloom.slices),
+            "bloom_mb": self.bloom.nbytes / 2 ** 20,
+        }
+
+# --------------------------------
+# STREAMING FILTER
+# --------------------------------
+def normalize_key(line):
+    # Same field split as the awk steps in uber_clean.sh; quoting/case vary between exports.
+    fields = line.split(",", ID_FIELD + 1)
+    return fields[ID_FIELD].strip().strip('"').strip().lower() if len(fields) > ID_FIELD else ""
+
+
+def filter_file(src, dst, index, batch):
+    """Copy src to dst without exact re-sends; returns (kept, of which updates, dropped)."""
+    kept = updates = dropped = 0
+    index.start_batch(batch)
+    with open(src, newline="") as fin, open(dst, "w", newline="") as fout:
+        header = fin.readline()
+        fout.write(header)
+        while True:
+            lines = fin.readlines(CHUNK_LINES * 160)
+            if not lines:
+                break
+            resent, updated = index.check_and_add([normalize_key(line) for line in lines], row_digest(lines), batch)
+            fout.writelines(line for line, d in zip(lines, resent) if not d)
+            dropped += int(resent.sum())
+            updates += int(updated.sum())
+            kept += len(lines) - int(resent.sum())
+    return kept, updates, dropped
+
+# --------------------------------
+# CLI
+# --------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Drop bookings re-sent unchanged from earlier batches")
+    parser.add_argument("--index", default=os.environ.get("BOOKING_INDEX", INDEX_PATH))
+    sub = parser.add_subparsers(dest="command", required=True)
+    f = sub.add_parser("filter", help="copy src to dst without rows already ingested unchanged")
+    f.add_argument("src")
+    f.add_argument("dst")
+    f.add_argument("--batch", required=True,
+                   help="id of this export, e.g. its content hash or export date; rerunning an id replaces its keys")
+    sub.add_parser("stats")
+    args = parser.parse_args()
+
+    index = BookingIndex(args.index)
+    try:
+        if args.command == "stats":
+            for name, value in index.stats().items():
+                print(f"{name:<8} {value:,.1f}" if isinstance(value, float) else f"{name:<8} {value:,}")
+            return
+        kept, updates, dropped = filter_file(args.src, args.dst, index, args.batch)
+        index.save()
+        print(f"[INFO] Kept {kept:,} rows ({updates:,} updates to earlier bookings), "
+              f"dropped {dropped:,} unchanged re-sends", file=sys.stderr)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+RULES_PATH = "cleaning_rules.json"
+BLOCK_BYTES = 64 << 20          # CSV bytes per chunk (~400k bookings)
+TYPES = ("text", "category", "int", "float", "date", "time")
+CASES = ("lower", "upper", "title")
+
+# --------------------------------
+# RULE STEPS
+# --------------------------------
+# A compiled column is a list of (rule name, step). Steps run on the column's *distinct*
+# values in a chunk ({"values": str Series, "null": bool mask, ...}), update that state in
+# place and return a mask of the values they changed; the engine weights it by row counts.
+
+def trim(col):
+    new = col["values"].str.strip()
+    hit = (new != col["values"]).to_numpy()
+    col["values"] = new
+    return hit
+
+
+def nulls(tokens):
+    tokens = list(tokens)
+
+    def step(col):
+        hit = col["values"].isin(tokens).to_numpy() & ~col["null"]
+        col["null"] |= hit
+        return hit
+    return step
+
+
+def replace(old, new):
+    def step(col):
+        out = col["values"].str.replace(old, new, regex=False)
+        hit = (out != col["values"]).to_numpy() & ~col["null"]
+        col["values"] = out
+        return hit
+    return step
+
+
+def regex(pattern, replacement):
+    # Validated here, but passed on as a string: a compiled pattern would push pandas off
+    # Arrow's vectorized regex kernel onto a per-cell Python loop.
+    re.compile(pattern)
+
+    def step(col):
+        new = col["values"].str.replace(pattern, replacement, regex=True)
+        hit = (new != col["values"]).to_numpy() & ~col["null"]
+        col["values"] = new
+        return hit
+    return step
+
+
+def case(mode):
+    def step(col):
+        new = getattr(col["values"].str, mode)()
+        hit = (new != col["values"]).to_numpy() & ~col["null"]
+        col["values"] = new
+        return hit
+    return step
+
+
+def canonical(values):
+    # Case-insensitive match onto the spelling downstream tables filter on ("eBike", "UPI").
+    lookup = {v.lower(): v for v in values}
+
+    def step(col):
+        mapped = col["values"].str.lower().map(lookup)
+        known = mapped.notna().to_numpy()
+        hit = known & (mapped != col["values"]).to_numpy() & ~col["null"]
+        col["values"] = mapped.where(known, col["values"])
+        col["unknown"] = ~known & ~col["null"]
+        return hit
+    return step
+
+
+def unknown(action):
+    def step(col):
+        if action == "null":
+            col["null"] |= col["unknown"]
+        return col["unknown"]
+    return step
+
+
+def parse_number(integer):
+    def step(col):
+        number = pd.to_numeric(col["values"].where(~col["null"]), errors="coerce").to_numpy(dtype="float64", copy=True)
+        bad = np.isnan(number) & ~col["null"]
+        if integer:
+            bad |= ~np.isnan(number) & (number != np.round(number))
+        col["number"] = number
+        col["changed"] = np.zeros(len(number), dtype=bool)
+        col["null"] |= bad
+        return bad
+    return step
+
+
+def absolute(col):
+    hit = (col["number"] < 0) & ~col["null"]
+    col["number"][hit] = -col["number"][hit]
+    col["changed"] |= hit
+    return hit
+
+
+def _bounds(bounds):
+    lo, hi = bounds
+    return -np.inf if lo is None else lo, np.inf if hi is None else hi
+
+
+def clip(bounds):
+    lo, hi = _bounds(bounds)
+
+    def step(col):
+        hit = ((col["number"] < lo) | (col["number"] > hi)) & ~col["null"]
+        col["number"][hit] = np.clip(col["number"][hit], lo, hi)
+        col["changed"] |= hit
+        return hit
+    return step
+
+
+def in_range(bounds):
+    lo, hi = _bounds(bounds)
+
+    def step(col):
+        hit = ((col["number"] < lo) | (col["number"] > hi)) & ~col["null"]
+        col["null"] |= hit
+        return hit
+    return step
+
+
+def _rewrite(col, mask, texts):
+    values = col["values"].to_numpy(dtype=object, copy=True)
+    values[mask] = texts
+    col["values"] = pd.Series(values, index=col["values"].index, dtype=object)
+
+
+def format_number(integer):
+    # Untouched cells keep their original text; only rewritten numbers are re-rendered.
+    def step(col):
+        hit = col["changed"] & ~col["null"]
+        if hit.any():
+            fmt = (lambda x: str(int(x))) if integer else (lambda x: format(x, ".15g"))
+            _rewrite(col, hit, [fmt(x) for x in col["number"][hit]])
+        return hit
+    return step
+
+
+def parse_datetime(formats):
+    # The first format is the output format; later ones are accepted and rewritten into it.
+    def step(col):
+        values = col["values"]
+        parsed = pd.to_datetime(values.where(~col["null"]), format=formats[0], errors="coerce")
+        rewrite = np.zeros(len(values), dtype=bool)
+        for fmt in formats[1:]:
+            pending = parsed.isna().to_numpy() & ~col["null"]
+            if not pending.any():
+                break
+            alt = pd.to_datetime(values[pending], format=fmt, errors="coerce")
+            parsed[pending] = alt
+            rewrite[pending] = alt.notna().to_numpy()
+        bad = parsed.isna().to_numpy() & ~col["null"]
+        if rewrite.any():
+            _rewrite(col, rewrite, parsed[rewrite].dt.strftime(formats[0]).to_numpy(dtype=object))
+        col["null"] |= bad
+        col["rewritten"] = rewrite
+        return bad
+    return step
+
+
+def reformatted(col):
+    return col["rewritten"]
+
+# --------------------------------
+# COMPILE
+# --------------------------------
+def compile_column(rule, null_tokens, field_replace=()):
+    kind = rule.get("type", "text")
+    if kind not in TYPES:
+        raise ValueError(f"unknown type {kind!r}")
+    tokens = set(null_tokens) | set(rule.get("null_tokens", []))
+    pairs = list(field_replace) + rule.get("replace", [])
+    steps = [(f"replace[{i}]", replace(a, b)) for i, (a, b) in enumerate(pairs)]
+    steps.append(("trim", trim))
+    steps += [(f"regex[{i}]", regex(p, r)) for i, (p, r) in enumerate(rule.get("regex", []))]
+    steps.append(("null", nulls(tokens)))
+    if rule.get("case"):
+        if rule["case"] not in CASES:
+            raise ValueError(f"unknown case {rule['case']!r}")
+        steps.append(("case", case(rule["case"])))
+    if kind == "category" and rule.get("values"):
+        steps.append(("canonical", canonical(rule["values"])))
+        steps.append(("unknown", unknown(rule.get("on_unknown", "keep"))))
+    elif kind in ("int", "float"):
+        integer = kind == "int"
+        steps.append(("invalid", parse_number(integer)))
+        if rule.get("abs"):
+            steps.append(("abs", absolute))
+        if rule.get("clip"):
+            steps.append(("clip", clip(rule["clip"])))
+        if rule.get("range"):
+            steps.append(("range", in_range(rule["range"])))
+        steps.append(("rewritten", format_number(integer)))
+    elif kind in ("date", "time"):
+        steps.append(("invalid", parse_datetime(rule["formats"])))
+        steps.append(("reformatted", reformatted))
+    return steps
+
+
+def compile_rules(spec, header):
+    """Turn the declarative spec into one step list per CSV column (unlisted columns: trim + nulls)."""
+    missing = set(spec["columns"]) - set(header)
+    if missing:
+        raise SystemExit(f"[ERROR] rules name columns not in the file: {sorted(missing)}")
+    null_tokens = spec.get("null_tokens", [""])
+    field_replace = spec.get("field_replace", [])
+    return {name: compile_column(spec["columns"].get(name, {}), null_tokens, field_replace) for name in header}
+
+# --------------------------------
+# FUSED CHUNK ENGINE
+# --------------------------------
+def clean_column(array, steps, output_null, counters, name):
+    """Run every rule of one column over its distinct values, then map rows back once."""
+    # Every rule is a per-cell function, so it only has to see each distinct value once:
+    # 366 dates or 22 ratings per chunk instead of hundreds of thousands of cells.
+    encoded = pc.dictionary_encode(array)
+    codes = encoded.indices.to_numpy(zero_copy_only=False)
+    weights = np.bincount(codes, minlength=len(encoded.dictionary))
+    col = {"values": encoded.dictionary.to_pandas(), "null": np.zeros(len(encoded.dictionary), dtype=bool)}
+    for rule, step in steps:
+        counters[f"{name}.{rule}"] += int(weights[step(col)].sum())
+    final = col["values"].to_numpy(dtype=object, copy=True)
+    final[col["null"]] = output_null
+    return final, codes, col["null"]
+
+
+class Deduper:
+    # 64-bit hashes of the dedupe key seen so far; rows without a key are never dropped.
+    def __init__(self, key):
+        self.key = key
+        self.seen = np.empty(0, dtype=np.uint64)
+
+    def __call__(self, columns):
+        hashes = np.zeros(len(columns[self.key[0]][1]), dtype=np.uint64)
+        present = np.ones(len(hashes), dtype=bool)
+        for name in self.key:
+            final, codes, null = columns[name]
+            hashes = hashes * np.uint64(0x9E3779B97F4A7C15) ^ pd.util.hash_array(final, categorize=False)[codes]
+            present &= ~null[codes]
+        dup = present & (pd.Series(hashes).duplicated().to_numpy() | np.isin(hashes, self.seen))
+        self.seen = np.union1d(self.seen, hashes[present & ~dup])
+        return dup
+
+
+def read_header(src):
+    with open(src, newline="") as f:
+        return [c.strip() for c in next(csv.reader(f))]
+
+
+def clean_file(src, dst, spec, block_bytes=BLOCK_BYTES):
+    header = read_header(src)
+    program = compile_rules(spec, header)
+    counters = Counter({f"{name}.{rule}": 0 for name, steps in program.items() for rule, _ in steps})
+    dedupe = Deduper(spec["dedupe_key"]) if spec.get("dedupe_key") else None
+    output_null = spec.get("output_null", "null")
+
+    def malformed(row):
+        counters["*.malformed"] += 1
+        return "skip"
+
+    # Everything stays text on the way in; typing is the rules' job, not the reader's.
+    reader = pacsv.open_csv(
+        src,
+        read_options=pacsv.ReadOptions(column_names=header, skip_rows=1, block_size=block_bytes),
+        parse_options=pacsv.ParseOptions(invalid_row_handler=malformed),
+        convert_options=pacsv.ConvertOptions(column_types={c: pa.string() for c in header},
+                                             strings_can_be_null=False, quoted_strings_can_be_null=False),
+    )
+    rows = kept = 0
+    with open(dst, "wb") as out:
+        out.write((",".join(header) + "\n").encode())
+        for batch in reader:
+            columns = {name: clean_column(batch.column(name), program[name], output_null, counters, name)
+                       for name in header}
+            keep = np.ones(batch.num_rows, dtype=bool)
+            if dedupe is not None:
+                dup = dedupe(columns)
+                counters["*.dedupe"] += int(dup.sum())
+                keep &= ~dup
+            table = pa.table({
+                name: pa.array(final, type=pa.string()).take(codes[keep])
+                for name, (final, codes, _) in columns.items()
+            })
+            # Unquoted, like every earlier stage: the analytics awk scripts split on bare commas.
+            pacsv.write_csv(table, out, pacsv.WriteOptions(include_header=False, quoting_style="none"))
+            rows += batch.num_rows
+            kept += int(keep.sum())
+    return rows, kept, counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean a bookings CSV with declarative per-column rules")
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    parser.add_argument("--rules", default=RULES_PATH)
+    parser.add_argument("--block-mb", type=int, default=BLOCK_BYTES >> 20, help="CSV megabytes per chunk")
+    args = parser.parse_args()
+
+    with open(args.rules) as f:
+        spec = json.load(f)
+    started = time.perf_counter()
+    rows, kept, counters = clean_file(args.src, args.dst, spec, args.block_mb << 20)
+    print(f"[INFO] Cleaned {rows:,} rows → {kept:,} kept in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    for rule, hits in counters.items():
+        if hits:
+            print(f"[INFO]   {rule:<48} {hits:>10,}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+import frame_queries
+import queries
+import shared_dataset
+from queries import BOOKING_COLUMNS, DB_PATH, has_table, read_catalog, select_partitions
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+CSV_PATH = "ncr_ride_bookings_clean.csv"
+
+# "sqlite" reads the pipeline's pre-aggregated tables and the CSV through pandas;
+# "duckdb" runs every aggregation directly over the cleaned CSV/Parquet files.
+BACKEND = os.environ.get("ANALYTICS_BACKEND", "sqlite")
+
+# Set once per server process, the first time any page imports this module.
+PROCESS_START = time.perf_counter()
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------
+# DB HELPERS
+# --------------------------------
+@st.cache_data(ttl=60, show_spinner=False)
+def table_exists(name, db=DB_PATH):
+    # Tables added after the original seven only exist once the pipeline has been rerun.
+    return has_table(name, db)
+
+# --------------------------------
+# PARTITION CATALOG
+# --------------------------------
+@st.cache_data(ttl=60, show_spinner=False)
+def load_catalog():
+    return read_catalog()
+
+
+def default_sources():
+    # Without a catalog the app runs on the single legacy NCR dataset.
+    catalog = load_catalog()
+    if catalog.empty:
+        return (DB_PATH,), (CSV_PATH,)
+    city = catalog["city"].iloc[0]
+    months = catalog.loc[catalog["city"] == city, "month"]
+    return select_partitions(city, months.min(), months.max())
+
+# --------------------------------
+# LOAD RAW CSV (LAZY, SHARED)
+# --------------------------------
+@st.cache_data(show_spinner="Loading bookings...")
+def load_partition_csv(path):
+    return shared_dataset.prepare(pd.read_csv(path))
+
+
+def load_partition(path):
+    # A version published by the pipeline is memory-mapped once and shared by every session
+    # and server process; st.cache_data would hand each caller its own unpickled copy.
+    frame = shared_dataset.latest(path)
+    if frame is not None:
+        return frame
+    # Nothing published yet, or the CSV was rebuilt since: read it directly. Snapshot-only
+    # deployments ship the SQLite DBs without the raw CSV.
+    return load_partition_csv(path) if os.path.exists(path) else None
+
+
+def load_csv(paths=(CSV_PATH,)):
+    frames = [frame for frame in map(load_partition, paths) if frame is not None]
+    if not frames:
+        df = pd.DataFrame(columns=BOOKING_COLUMNS)
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df.assign(DayOfWeek=pd.Series(dtype=str), Hour=pd.Series(dtype=float))
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+# --------------------------------
+# QUERY BACKEND
+# --------------------------------
+def _has_cleaned_file(path):
+    return os.path.exists(path) or os.path.exists(os.path.splitext(path)[0] + ".parquet")
+
+
+def active_backend(csvs):
+    # DuckDB reads the cleaned files themselves; a snapshot-only deployment (or a missing
+    # partition file) falls back to the SQLite tables, like the raw charts already do.
+    if BACKEND == "duckdb" and all(map(_has_cleaned_file, csvs)):
+        return "duckdb"
+    return "sqlite"
+
+
+def query_backend(dbs, csvs):
+    if active_backend(csvs) == "duckdb":
+        import duck_queries  # optional dependency, only needed for this backend
+        return duck_queries, csvs
+    return queries, dbs
+
+
+def raw_backend(csvs):
+    if active_backend(csvs) == "duckdb":
+        import duck_queries
+        return duck_queries, csvs
+    return frame_queries, load_csv(csvs)
+
+# --------------------------------
+# BACKGROUND WARM-UP
+# --------------------------------
+def _warm_up():
+    if BACKEND == "duckdb":
+        return
+    _, csvs = default_sources()
+    load_csv(csvs)
+
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    # cache_resource makes this run once per process, whichever page is hit first. Streamlit
+    # only runs page scripts for a session, so the first visitor still starts the warm-up;
+    # with a published shared dataset that first load is a memory map rather than a CSV parse.
+    thread = threading.Thread(target=_warm_up, name="bookings-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+# --------------------------------
+# STATIC ASSETS
+# --------------------------------
+@st.cache_resource(show_spinner=False)
+def load_asset_bytes(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@st.cache_resource(show_spinner=False)
+def load_asset_text(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+# --------------------------------
+# STARTUP TIMING
+# --------------------------------
+def start_page_timer():
+    return time.perf_counter()
+
+
+def report_first_paint(page, started):
+    now = time.perf_counter()
+    key = f"_first_paint_{page}"
+    if key not in st.session_state:
+        st.session_state[key] = {
+            "page_ms": (now - started) * 1000,
+            "since_process_start_ms": (now - PROCESS_START) * 1000,
+        }
+        logger.info(
+            "%s: first paint in %.0f ms (%.0f ms since process start)",
+            page, st.session_state[key]["page_ms"], st.session_state[key]["since_process_start_ms"]
+        )
+    timing = st.session_state[key]
+    st.sidebar.caption(f"⏱️ {page} first paint: {timing['page_ms']:.0f} ms")
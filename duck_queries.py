@@ -0,0 +1,364 @@
+import argparse
+import os
+import threading
+
+import duckdb
+import pandas as pd
+
+import locations as geo
+from queries import BOOKING_COLUMNS
+from ratings_stats import BIN_WIDTH, N_BINS
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+NULL_TOKENS = ["NULL", "null", "NaN", "nan", ""]
+
+# Full schema up front: skipping the CSV sniffer saves ~0.1s per file per query
+# and keeps every partition file on the same types.
+COLUMN_TYPES = {
+    "Date": "DATE",
+    "Time": "TIME",
+    "Cancelled Rides by Customer": "DOUBLE",
+    "Cancelled Rides by Driver": "DOUBLE",
+    "Booking Value": "DOUBLE",
+    "Ride Distance": "DOUBLE",
+    "Driver Ratings": "DOUBLE",
+    "Customer Rating": "DOUBLE",
+}
+
+# (SQLite table, column) the dashboard asks for -> expression over the raw bookings
+DIMENSIONS = {
+    ("ride_status_distribution", "status"): '"Booking Status"',
+    ("vehicle_demand", "vehicle_type"): '"Vehicle Type"',
+    ("top_pickup_locations", "location"): '"Pickup Location"',
+    ("top_drop_locations", "location"): '"Drop Location"',
+    ("payment_methods", "method"): '"Payment Method"',
+}
+
+# Booking Value in integer paise, so sums are exact whatever the storage type
+PAISE = 'CAST(round("Booking Value" * 100) AS BIGINT)'
+
+# revenue_segments segment -> expression (see uber_analytics_sqlite.sh)
+REVENUE_SEGMENTS = {
+    "all": "'all'",
+    "status": '"Booking Status"',
+    "vehicle": '"Vehicle Type"',
+    "payment": '"Payment Method"',
+    "pickup_location": '"Pickup Location"',
+    "day": 'CAST("Date" AS VARCHAR)',
+}
+
+# raw_df column names used by the dashboard -> DuckDB expression
+RAW_COLUMNS = {
+    "Date": '"Date"',
+    "DayOfWeek": 'dayname("Date")',
+    "Hour": 'hour("Time")',
+    "Vehicle Type": '"Vehicle Type"',
+}
+
+_con = None
+_lock = threading.Lock()
+
+# --------------------------------
+# ENGINE
+# --------------------------------
+def connection():
+    # One in-process database; every caller gets its own cursor so threads can query concurrently.
+    global _con
+    with _lock:
+        if _con is None:
+            _con = duckdb.connect()
+    return _con.cursor()
+
+
+def source(files, prefer_parquet=True):
+    if prefer_parquet:
+        files = [_prefer_parquet(f) for f in files]
+    listing = "[" + ", ".join(f"'{f}'" for f in files) + "]"
+    if all(f.endswith(".parquet") for f in files):
+        return f"read_parquet({listing}, union_by_name = true)"
+    columns = "{" + ", ".join(f"'{c}': '{COLUMN_TYPES.get(c, 'VARCHAR')}'" for c in BOOKING_COLUMNS) + "}"
+    nulls = "[" + ", ".join(f"'{t}'" for t in NULL_TOKENS) + "]"
+    return (
+        f"read_csv({listing}, header = true, auto_detect = false, delim = ',', quote = '\"', "
+        f"nullstr = {nulls}, columns = {columns})"
+    )
+
+
+def _prefer_parquet(path):
+    # A conversion older than its CSV predates the last clean/merge; read the CSV instead.
+    parquet = os.path.splitext(path)[0] + ".parquet"
+    if not os.path.exists(parquet):
+        return path
+    if os.path.exists(path) and os.path.getmtime(parquet) < os.path.getmtime(path):
+        return path
+    return parquet
+
+
+def to_parquet(csv, out=None):
+    out = out or os.path.splitext(csv)[0] + ".parquet"
+    connection().execute(
+        f"COPY (SELECT * FROM {source([csv], prefer_parquet=False)}) TO '{out}' (FORMAT parquet, COMPRESSION zstd)"
+    )
+    return out
+
+
+def query(files, sql, params=()):
+    return connection().execute(sql.format(bookings=source(files)), list(params)).df()
+
+# --------------------------------
+# DASHBOARD QUERIES (same names and columns as queries.py)
+# --------------------------------
+def distinct(files, column, table):
+    expr = DIMENSIONS[(table, column)]
+    limit = "LIMIT 5" if table.startswith("top_") else ""
+    return query(files, f"""
+        SELECT {expr} AS value FROM {{bookings}}
+        WHERE {expr} IS NOT NULL
+        GROUP BY 1 ORDER BY count(*) DESC {limit}
+    """)["value"].tolist()
+
+
+def kpis(files):
+    # Same definitions as uber_analytics_sqlite.sh; revenue is summed in integer paise.
+    row = query(files, f"""
+        SELECT
+            count(*) AS bookings,
+            sum({PAISE}) FILTER (WHERE "Booking Status" = 'Completed') / 100 AS revenue,
+            sum({PAISE}) / count({PAISE}) / 100 AS avg_value,
+            sum("Ride Distance") / count(*) AS avg_distance,
+            avg("Driver Ratings") AS avg_rating,
+            stddev_samp("Driver Ratings") AS rating_std,
+            count("Driver Ratings") AS rating_n,
+            count({PAISE}) FILTER (WHERE "Booking Status" = 'Completed') AS completed,
+            count({PAISE}) AS valued
+        FROM {{bookings}}
+    """).iloc[0]
+    ci = 1.96 * row["rating_std"] / row["rating_n"] ** 0.5 if row["rating_n"] > 1 else 0.0
+    return pd.DataFrame({
+        "metric": ["Total Bookings", "Total Revenue (Completed)", "Average Booking Value",
+                   "Average Ride Distance", "Average Driver Rating"],
+        "value": [row["bookings"], row["revenue"], row["avg_value"], row["avg_distance"], row["avg_rating"]],
+        "ci": [None, None, None, None, ci],
+        "n": [None, int(row["completed"]), int(row["valued"]), None, int(row["rating_n"])],
+    })
+
+
+def revenue(files, segment):
+    df = query(files, f"""
+        SELECT {REVENUE_SEGMENTS[segment]} AS segment_value,
+               count(*) AS bookings,
+               count({PAISE}) AS valued,
+               coalesce(sum({PAISE}), 0) AS revenue_paise,
+               count({PAISE}) FILTER (WHERE "Booking Status" = 'Completed') AS completed,
+               coalesce(sum({PAISE}) FILTER (WHERE "Booking Status" = 'Completed'), 0) AS completed_paise
+        FROM {{bookings}} GROUP BY 1
+    """)
+    return df.assign(
+        revenue=df["revenue_paise"] / 100,
+        completed_revenue=df["completed_paise"] / 100,
+        avg_value=(df["revenue_paise"] / df["valued"].where(df["valued"] > 0)) / 100,
+    )
+
+
+def _counts(files, expr, name, values, top=None):
+    inner_limit = f"LIMIT {top}" if top else ""
+    return query(files, f"""
+        SELECT * FROM (
+            SELECT {expr} AS {name}, count(*) AS count FROM {{bookings}}
+            GROUP BY 1 ORDER BY count DESC {inner_limit}
+        ) WHERE list_contains(?, {name})
+    """, [list(values)])
+
+
+def ride_status(files, statuses):
+    return _counts(files, '"Booking Status"', "status", statuses)
+
+
+def vehicle_demand(files, vehicles):
+    return _counts(files, '"Vehicle Type"', "vehicle_type", vehicles)
+
+
+def top_pickups(files, locations):
+    return _counts(files, '"Pickup Location"', "location", locations, top=5)
+
+
+def top_drops(files, locations):
+    return _counts(files, '"Drop Location"', "location", locations, top=5)
+
+
+def payment_methods(files, methods):
+    return _counts(files, '"Payment Method"', "method", methods)
+
+
+def cancellations(files):
+    return query(files, """
+        SELECT 'Customer' AS type, sum("Cancelled Rides by Customer") FILTER (WHERE "Cancelled Rides by Customer" > 0) AS total FROM {bookings}
+        UNION ALL
+        SELECT 'Driver', sum("Cancelled Rides by Driver") FILTER (WHERE "Cancelled Rides by Driver" > 0) FROM {bookings}
+    """)
+
+
+def _cancellation_facts(canceller):
+    if canceller == "Customer":
+        return '"Cancelled Rides by Customer"', '"Reason for cancelling by Customer"'
+    return '"Cancelled Rides by Driver"', '"Driver Cancellation Reason"'
+
+
+def _cancellation_breakdown(files, expr, name, canceller, reason, vehicles):
+    count, reason_col = _cancellation_facts(canceller)
+    reason_filter = "" if reason is None else f"AND {reason_col} = ?"
+    params = ([] if reason is None else [reason]) + [list(vehicles)]
+    return query(files, f"""
+        SELECT {expr} AS {name}, sum({count}) AS total FROM {{bookings}}
+        WHERE {count} > 0 {reason_filter} AND list_contains(?, "Vehicle Type")
+        GROUP BY 1
+    """, params)
+
+
+def cancellation_reasons(files, canceller, vehicles):
+    _, reason_col = _cancellation_facts(canceller)
+    return _cancellation_breakdown(
+        files, reason_col, "reason", canceller, None, vehicles
+    ).sort_values("total", ascending=False)
+
+
+def cancellation_zones(files, canceller, reason, vehicles, limit=10):
+    return _cancellation_breakdown(
+        files, '"Pickup Location"', "pickup_location", canceller, reason, vehicles
+    ).nlargest(limit, "total")
+
+
+def cancellation_hours(files, canceller, reason, vehicles):
+    return _cancellation_breakdown(
+        files, 'hour("Time")', "hour", canceller, reason, vehicles
+    ).sort_values("hour")
+
+
+def daily_rides(files, statuses, vehicles):
+    return query(files, """
+        SELECT "Date" AS date, count(*) AS rides FROM {bookings}
+        WHERE list_contains(?, "Booking Status") AND list_contains(?, "Vehicle Type")
+        GROUP BY 1 ORDER BY 1
+    """, [list(statuses), list(vehicles)])
+
+
+def od_pairs(files, statuses, vehicles, pickups=None, drops=None, limit=50):
+    where = ['list_contains(?, "Booking Status")', 'list_contains(?, "Vehicle Type")']
+    params = [list(statuses), list(vehicles)]
+    if pickups is not None:
+        where.append('list_contains(?, "Pickup Location")')
+        params.append(list(pickups))
+    if drops is not None:
+        where.append('list_contains(?, "Drop Location")')
+        params.append(list(drops))
+    return query(files, f"""
+        SELECT "Pickup Location" AS pickup_location, "Drop Location" AS drop_location, count(*) AS trips
+        FROM {{bookings}} WHERE {" AND ".join(where)}
+        GROUP BY 1, 2 ORDER BY trips DESC LIMIT {int(limit)}
+    """, params)
+
+def locations(files):
+    names = query(files, """
+        SELECT "Pickup Location" AS name FROM {bookings} UNION SELECT "Drop Location" FROM {bookings}
+    """)["name"].dropna()
+    return geo.dimension(names, geo.read_seed())[["name", "lat", "lon", "zone"]]
+
+
+def _pickups(files):
+    return query(files, """
+        SELECT "Pickup Location" AS name, count(*) AS trips FROM {bookings}
+        WHERE "Pickup Location" IS NOT NULL GROUP BY 1
+    """)
+
+
+def zone_pickups(files):
+    return locations(files).merge(_pickups(files), on="name")
+
+
+def zone_bands(files):
+    edges = geo.BAND_EDGES
+    cases = " ".join(
+        f"WHEN \"Ride Distance\" < {hi} THEN '{label}'"
+        for hi, label in zip(edges[1:-1], geo.BAND_LABELS)
+    )
+    df = query(files, f"""
+        SELECT "Pickup Location" AS name,
+               CASE WHEN "Ride Distance" IS NULL THEN '{geo.NO_DISTANCE}' {cases} ELSE '{geo.BAND_LABELS[-1]}' END AS band,
+               count(*) AS trips
+        FROM {{bookings}} WHERE "Pickup Location" IS NOT NULL GROUP BY 1, 2
+    """)
+    df = df.merge(locations(files)[["name", "zone"]], on="name")
+    return df.groupby(["zone", "band"], as_index=False)["trips"].sum()
+
+
+def rides_within(files, name, km):
+    located = locations(files).dropna(subset=["lat", "lon"])
+    center = located.loc[located["name"] == name]
+    if center.empty:
+        return located.iloc[:0].assign(km=0.0, trips=0)
+    center = center.iloc[0]
+    nearby = located.assign(km=geo.haversine_km(center["lat"], center["lon"], located["lat"], located["lon"]))
+    nearby = nearby[nearby["km"] <= km].merge(_pickups(files), on="name", how="left").fillna({"trips": 0})
+    return nearby.astype({"trips": "int64"}).sort_values("km")
+
+# --------------------------------
+# RAW-FRAME AGGREGATIONS (same names and columns as frame_queries.py)
+# --------------------------------
+def status_counts(files):
+    return query(files, """
+        SELECT "Booking Status", count(*) AS count FROM {bookings} GROUP BY 1
+    """)
+
+
+def rides_by(files, column):
+    return query(files, f"""
+        SELECT {RAW_COLUMNS[column]} AS "{column}", count(*) AS Rides FROM {{bookings}}
+        GROUP BY 1 ORDER BY 1
+    """)
+
+
+def booking_value_box(files):
+    return query(files, """
+        SELECT "Vehicle Type",
+               min(v) AS min, quantile_cont(v, 0.25) AS q1, median(v) AS median,
+               quantile_cont(v, 0.75) AS q3, max(v) AS max
+        FROM (SELECT "Vehicle Type", "Booking Value" AS v FROM {bookings} WHERE "Booking Value" IS NOT NULL)
+        GROUP BY 1 ORDER BY 1
+    """)
+
+
+def od_counts(files, limit=50):
+    return query(files, f"""
+        SELECT "Pickup Location", "Drop Location", count(*) AS Trips FROM {{bookings}}
+        GROUP BY 1, 2 ORDER BY Trips DESC LIMIT {int(limit)}
+    """)
+
+
+def rating_histogram(files, column):
+    return query(files, f"""
+        SELECT least(floor("{column}" / {BIN_WIDTH}), {N_BINS - 1}) * {BIN_WIDTH} AS Rating,
+               count(*) AS count
+        FROM {{bookings}} WHERE "{column}" IS NOT NULL
+        GROUP BY 1 ORDER BY 1
+    """)
+
+
+def preview(files, limit):
+    return query(files, f"SELECT * FROM {{bookings}} LIMIT {int(limit)}")
+
+# --------------------------------
+# CLI
+# --------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Convert a cleaned bookings CSV to Parquet for the DuckDB engine")
+    parser.add_argument("csv")
+    parser.add_argument("parquet", nargs="?")
+    args = parser.parse_args()
+
+    print(f"[INFO] Wrote {to_parquet(args.csv, args.parquet)}")
+
+
+if __name__ == "__main__":
+    main()
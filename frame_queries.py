@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from ratings_stats import BIN_WIDTH, N_BINS
+
+# --------------------------------
+# RAW-FRAME AGGREGATIONS (pandas, over load_csv())
+# --------------------------------
+def status_counts(df):
+    return df.groupby("Booking Status").size().reset_index(name="count")
+
+
+def rides_by(df, column):
+    return df.groupby(column).size().reset_index(name="Rides")
+
+
+def booking_value_box(df):
+    values = pd.to_numeric(df["Booking Value"], errors="coerce").dropna()
+    grouped = values.groupby(df.loc[values.index, "Vehicle Type"])
+    return pd.DataFrame({
+        "min": grouped.min(),
+        "q1": grouped.quantile(0.25),
+        "median": grouped.median(),
+        "q3": grouped.quantile(0.75),
+        "max": grouped.max(),
+    }).reset_index()
+
+
+def od_counts(df, limit=50):
+    heat = df.groupby(["Pickup Location", "Drop Location"]).size().reset_index(name="Trips")
+    return heat.sort_values("Trips", ascending=False).head(limit)
+
+
+def rating_histogram(df, column):
+    values = pd.to_numeric(df[column], errors="coerce").dropna()
+    bins = np.minimum(values // BIN_WIDTH, N_BINS - 1) * BIN_WIDTH
+    return bins.value_counts().sort_index().rename_axis("Rating").reset_index(name="count")
+
+
+def preview(df, limit):
+    return df.head(limit)
@@ -0,0 +1,185 @@
+import argparse
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+SEED_PATH = "ncr_locations.csv"     # name, lat, lon, zone (approximate centroids)
+UNKNOWN_ZONE = "Unknown"
+NULL_TOKENS = ["NULL", "null", "NaN", "nan", ""]
+CHUNK_ROWS = 200_000
+GRID_DEGREES = 0.05                 # ~5.5 km cells; coarse pre-filter when R*Tree is unavailable
+EARTH_KM = 6371.0
+
+# Ride Distance bands (km, right-open); rides without a distance go to "n/a". Bands bin the
+# distance each ride actually logged, not the centroid-to-centroid distance: centroids are
+# approximate, unseeded names have none, and a pickup and drop in the same place would all
+# land in "0-5 km".
+BAND_EDGES = [0, 5, 10, 20, 30, np.inf]
+BAND_LABELS = ["0-5 km", "5-10 km", "10-20 km", "20-30 km", "30+ km"]
+NO_DISTANCE = "n/a"
+
+# --------------------------------
+# DIMENSION
+# --------------------------------
+def normalize(name):
+    # Case in the cleaned file depends on cleaning_rules.json; match the seed case-insensitively.
+    return name.str.strip().str.lower()
+
+
+def read_seed(path=SEED_PATH):
+    seed = pd.read_csv(path)
+    return seed.assign(key=normalize(seed["name"]))
+
+
+def dimension(names, seed):
+    """Seed locations first (stable IDs across partitions), then any unseen names as Unknown."""
+    names = pd.Series(sorted(set(names)), dtype=object)
+    known = seed[["key", "name", "lat", "lon", "zone"]].rename(columns={"name": "display"})
+    seen = pd.DataFrame({"name": names, "key": normalize(names)}).drop_duplicates("key")
+    dim = known.merge(seen, on="key", how="left")
+    dim["name"] = dim["name"].fillna(dim["display"])
+    extra = seen[~seen["key"].isin(known["key"])].assign(zone=UNKNOWN_ZONE)
+    dim = pd.concat([dim, extra], ignore_index=True)
+    dim.insert(0, "location_id", np.arange(1, len(dim) + 1))
+    dim["cell_x"] = np.floor(dim["lon"] / GRID_DEGREES).astype("Int64")
+    dim["cell_y"] = np.floor(dim["lat"] / GRID_DEGREES).astype("Int64")
+    return dim[["location_id", "name", "lat", "lon", "zone", "cell_x", "cell_y"]]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(a))
+
+
+def bounding_box(lat, lon, km):
+    dlat = np.degrees(km / EARTH_KM)
+    dlon = np.degrees(km / (EARTH_KM * np.cos(np.radians(lat))))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+# --------------------------------
+# OD DISTANCE BANDS
+# --------------------------------
+def band(distance):
+    labels = pd.cut(distance, BAND_EDGES, right=False, labels=BAND_LABELS)
+    return labels.astype(object).where(distance.notna(), NO_DISTANCE)
+
+
+def build(path):
+    usecols = ["Pickup Location", "Drop Location", "Ride Distance"]
+    parts = []
+    for chunk in pd.read_csv(path, usecols=usecols, na_values=NULL_TOKENS,
+                             dtype=str, chunksize=CHUNK_ROWS):
+        chunk = chunk.dropna(subset=["Pickup Location", "Drop Location"])
+        distance = pd.to_numeric(chunk["Ride Distance"], errors="coerce")
+        parts.append(
+            chunk.assign(band=band(distance), distance=distance)
+            .groupby(["Pickup Location", "Drop Location", "band"])
+            .agg(trips=("band", "size"), distance_km=("distance", "sum"))
+        )
+    if not parts:
+        raise SystemExit(f"[ERROR] {path} has no rows")
+    od = pd.concat(parts).groupby(level=[0, 1, 2]).sum().reset_index()
+    return od.rename(columns={"Pickup Location": "pickup", "Drop Location": "drop"})
+
+# --------------------------------
+# STORAGE
+# --------------------------------
+SCHEMA = """
+DROP TABLE IF EXISTS location_dim;
+DROP TABLE IF EXISTS location_rtree;
+DROP TABLE IF EXISTS od_bands;
+
+CREATE TABLE location_dim (
+    location_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    lat REAL,
+    lon REAL,
+    zone TEXT,
+    cell_x INTEGER,
+    cell_y INTEGER
+);
+
+CREATE TABLE od_bands (
+    pickup_id INTEGER,
+    drop_id INTEGER,
+    band TEXT,
+    trips INTEGER,
+    distance_km REAL,
+    PRIMARY KEY (pickup_id, drop_id, band)
+) WITHOUT ROWID;
+"""
+
+INDEXES = """
+CREATE INDEX idx_location_dim_zone ON location_dim (zone, location_id);
+CREATE INDEX idx_location_dim_cell ON location_dim (cell_x, cell_y, location_id);
+CREATE INDEX idx_od_bands_drop ON od_bands (drop_id, pickup_id, band, trips);
+"""
+
+
+def statements(script):
+    return [sql for sql in script.split(";") if sql.strip()]
+
+
+def has_rtree(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.rtree_probe USING rtree(id, a, b)")
+        conn.execute("DROP TABLE temp.rtree_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def write_store(conn, dim, od):
+    ids = dict(zip(normalize(dim["name"]), dim["location_id"]))
+    od = od.assign(pickup_id=normalize(od["pickup"]).map(ids), drop_id=normalize(od["drop"]).map(ids))
+    # Spelling variants of one location collapse onto its ID.
+    od = od.groupby(["pickup_id", "drop_id", "band"], as_index=False)[["trips", "distance_km"]].sum()
+    located = dim.dropna(subset=["lat", "lon"])
+    # executescript() commits first, so the store is rebuilt statement by statement inside one
+    # explicit transaction: a failed build leaves the previous tables in place.
+    with conn:
+        conn.execute("BEGIN")
+        for sql in statements(SCHEMA):
+            conn.execute(sql)
+        conn.executemany(
+            "INSERT INTO location_dim VALUES (?, ?, ?, ?, ?, ?, ?)",
+            dim.astype(object).where(dim.notna(), None).itertuples(index=False)
+        )
+        conn.executemany(
+            "INSERT INTO od_bands VALUES (?, ?, ?, ?, ?)",
+            od[["pickup_id", "drop_id", "band", "trips", "distance_km"]].itertuples(index=False)
+        )
+        if has_rtree(conn):
+            # Point entries (min == max); radius lookups hit the R*Tree with a bounding box.
+            conn.execute("CREATE VIRTUAL TABLE location_rtree USING rtree(location_id, min_lat, max_lat, min_lon, max_lon)")
+            conn.executemany(
+                "INSERT INTO location_rtree VALUES (?, ?, ?, ?, ?)",
+                located[["location_id", "lat", "lat", "lon", "lon"]].itertuples(index=False)
+            )
+        for sql in statements(INDEXES):
+            conn.execute(sql)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the location dimension, spatial index and OD distance bands")
+    parser.add_argument("csv")
+    parser.add_argument("db")
+    parser.add_argument("--seed", default=SEED_PATH)
+    args = parser.parse_args()
+
+    od = build(args.csv)
+    dim = dimension(pd.concat([od["pickup"], od["drop"]]), read_seed(args.seed))
+    conn = sqlite3.connect(args.db)
+    write_store(conn, dim, od)
+    conn.close()
+    unknown = (dim["zone"] == UNKNOWN_ZONE).sum()
+    print(f"[INFO] Locations: {len(dim)} ({unknown} without a centroid), {len(od)} OD bands → {args.db}")
+
+
+if __name__ == "__main__":
+    main()
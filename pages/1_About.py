@@ -1,10 +1,21 @@
 import streamlit as st
 
+from data import load_asset_bytes, load_asset_text, report_first_paint, start_page_timer, start_warm_up
+
 st.set_page_config(
     page_title="About | NCR Ride Analytics",
     layout="wide"
 )
 
+page_started = start_page_timer()
+
+
+def show_image(path):
+    image = load_asset_bytes(path)
+    if image is not None:
+        st.image(image, use_container_width=True)
+
+
 st.title("Title: Uber Data Analytics Pipeline using Linux")
 st.write("### Name: Michael Fernandes")
 st.write("### UID: 2509006")
@@ -21,10 +32,7 @@ raw data ingestion to an interactive analytics dashboard.
 The goal was to create Pipelines using shell commands for cleaning data,analyzing and storing results in sqlite database and deploying results in streamlit..
 """)
 
-st.image(
-    "images/pipeline.jpg",
-    use_container_width=True
-)
+show_image("images/pipeline.jpg")
 
 st.divider()
 
@@ -49,10 +57,7 @@ This stage mimics how raw data is typically received in real-world pipelines.
 # --------------------------------
 st.header("🧹 Stage 2 — Data Cleaning ")
 
-st.image(
-    "images/clean.png",
-    use_container_width=True
-)
+show_image("images/clean.png")
 
 st.markdown("""
 The dataset was cleaned using a **custom Bash script**:
@@ -73,143 +78,7 @@ if st.button("Show / Hide cleaning.sh"):
     st.session_state.show_clean_code = not st.session_state.show_clean_code
     
 if st.session_state.show_clean_code:
-    st.code(
-        """#!/bin/bash
-
-# ============================================
-# CONFIG
-# ============================================
-INPUT="ncr_ride_bookings_dirty.csv"
-OUTPUT="ncr_ride_bookings_clean.csv"
-TMP="__tmp_clean.csv"
-
-set -e
-
-# ============================================
-# UTILS
-# ============================================
-log() {
-  echo "[INFO] $1"
-}
-
-# ============================================
-# 1. REMOVE LEADING / TRAILING WHITESPACE
-# ============================================
-trim_whitespace() {
-  log "Trimming whitespaces"
-  sed 's/^[ \\t]*//;s/[ \\t]*$//' "$INPUT" > "$TMP"
-}
-
-# ============================================
-# 2. NORMALIZE NULL VALUES
-# ============================================
-normalize_nulls() {
-  log "Normalizing NULL values"
-  sed -i '
-    s/, *,/,/g;
-    s/,,/,NULL,/g;
-    s/^,/NULL,/g;
-    s/,$/,NULL/g;
-    s/\\bNaN\\b/NULL/g;
-    s/\\bnan\\b/NULL/g;
-  ' "$TMP"
-}
-
-# ============================================
-# 3. REMOVE DUPLICATES
-# ============================================
-remove_duplicates() {
-  log "Removing duplicate rows"
-  awk '!seen[$0]++' "$TMP" > "$TMP.dup"
-  mv "$TMP.dup" "$TMP"
-}
-
-# ============================================
-# 4. FIX NEGATIVE NUMERIC VALUES
-# ============================================
-fix_negatives() {
-  log "Fixing negative numeric values"
-  awk -F',' '
-  NR==1 {print; next}
-  {
-    for (i=1; i<=NF; i++) {
-      if ($i ~ /^-[0-9]+(\\.[0-9]+)?$/) {
-        $i = abs($i)
-      }
-    }
-    print
-  }
-  function abs(x){return x<0?-x:x}
-  ' OFS=',' "$TMP" > "$TMP.neg"
-  mv "$TMP.neg" "$TMP"
-}
-
-# ============================================
-# 5. CAP EXTREME OUTLIERS
-# ============================================
-cap_outliers() {
-  log "Capping extreme outliers"
-  awk -F',' '
-  NR==1 {print; next}
-  {
-    for (i=1; i<=NF; i++) {
-      if ($i ~ /^[0-9]+(\\.[0-9]+)?$/ && $i > 1000000) {
-        $i = 1000000
-      }
-    }
-    print
-  }
-  ' OFS=',' "$TMP" > "$TMP.out"
-  mv "$TMP.out" "$TMP"
-}
-
-# ============================================
-# 6. STANDARDIZE TEXT
-# ============================================
-standardize_text() {
-  log "Standardizing text columns"
-  awk -F',' '
-  NR==1 {print; next}
-  {
-    for (i=1; i<=NF; i++) {
-      if ($i ~ /[A-Za-z]/) {
-        gsub(/^[ \\t]+|[ \\t]+$/, "", $i)
-        $i = tolower($i)
-      }
-    }
-    print
-  }
-  ' OFS=',' "$TMP" > "$TMP.txt"
-  mv "$TMP.txt" "$TMP"
-}
-
-# ============================================
-# 7. FINAL SANITY CLEAN
-# ============================================
-final_sanity() {
-  log "Final sanity cleanup"
-  sed -i 's/NULL,NULL/NULL/g' "$TMP"
-}
-
-# ============================================
-# PIPELINE
-# ============================================
-log "Starting cleaning pipeline"
-
-trim_whitespace
-normalize_nulls
-remove_duplicates
-fix_negatives
-cap_outliers
-standardize_text
-final_sanity
-
-mv "$TMP" "$OUTPUT"
-
-log "Cleaning complete → $OUTPUT"
-""",
-        language="bash"
-    )
+    st.code(load_asset_text("assets/cleaning.sh"), language="bash")
 
 
 # --------------------------------
@@ -217,10 +86,7 @@ log "Cleaning complete → $OUTPUT"
 # --------------------------------
 st.header("📊 Stage 3 — Analytics via Shell Scripting")
 
-st.image(
-    "images/analyze.png",
-    use_container_width=True
-)
+show_image("images/analyze.png")
 st.markdown("""
 Exploratory analytics were performed using **pure Bash + AWK**:
 
@@ -244,85 +110,11 @@ if st.button("Show / Hide analytics.sh"):
     st.session_state.show_ana_code = not st.session_state.show_ana_code
     
 if st.session_state.show_ana_code:
-    st.code(
-        """
-
-#!/bin/bash
-
-FILE="ncr_ride_bookings_clean.csv"
-
-
-# Remove header
-DATA=$(tail -n +2 "$FILE")
-
-
-# 1️⃣ Total number of bookings
-echo "1. Total bookings:"
-echo "$DATA" | wc -l
-echo "--------------------------------------------------"
-
-# 2️⃣ Completed vs Cancelled vs Incomplete rides
-echo "2. Ride status distribution:"
-echo "$DATA" | awk -F',' '{print $4}' | sort | uniq -c | sort -nr
-echo "--------------------------------------------------"
-
-# 3️⃣ Total revenue from completed rides
-echo "3. Total booking value (Completed rides):"
-echo "$DATA" | awk -F',' '$4=="Completed"{sum+=$17} END{printf "%.2f\n", sum}'
-echo "--------------------------------------------------"
-
-# 4️⃣ Average booking value
-echo "4. Average booking value:"
-echo "$DATA" | awk -F',' '{sum+=$17; c++} END{printf "%.2f\n", sum/c}'
-echo "--------------------------------------------------"
-
-# 5️⃣ Top 5 pickup locations
-echo "5. Top 5 pickup locations:"
-echo "$DATA" | awk -F',' '{print $7}' | sort | uniq -c | sort -nr | head -5
-echo "--------------------------------------------------"
-
-# 6️⃣ Top 5 drop locations
-echo "6. Top 5 drop locations:"
-echo "$DATA" | awk -F',' '{print $8}' | sort | uniq -c | sort -nr | head -5
-echo "--------------------------------------------------"
-
-# 7️⃣ Vehicle type demand
-echo "7. Rides by vehicle type:"
-echo "$DATA" | awk -F',' '{print $6}' | sort | uniq -c | sort -nr
-echo "--------------------------------------------------"
-
-# 8️⃣ Cancellation analysis (Customer vs Driver)
-echo "8. Total cancellations:"
-echo "Cancelled by Customer:"
-echo "$DATA" | awk -F',' '$11>0{sum+=$11} END{print sum}'
-echo "Cancelled by Driver:"
-echo "$DATA" | awk -F',' '$13>0{sum+=$13} END{print sum}'
-echo "--------------------------------------------------"
-
-# 9️⃣ Average ride distance & ratings
-echo "9. Ride quality metrics:"
-echo "Average Ride Distance (km):"
-echo "$DATA" | awk -F',' '{sum+=$18; c++} END{printf "%.2f\n", sum/c}'
-echo "Average Driver Rating:"
-echo "$DATA" | awk -F',' '$19!=""{sum+=$19; c++} END{printf "%.2f\n", sum/c}'
-echo "--------------------------------------------------"
-
-# 🔟 Payment method usage
-echo "10. Payment method distribution:"
-echo "$DATA" | awk -F',' '{print $21}' | sort | uniq -c | sort -nr
-
-""",
-        language="bash"
-    )
-
-st.image(
-    "images/analytics_1.png",
-    use_container_width=True
-)
-st.image(
-    "images/analytics2.png",
-    use_container_width=True
-)
+    st.code(load_asset_text("assets/uber_analytics.sh"), language="bash")
+
+show_image("images/analytics_1.png")
+show_image("images/analytics2.png")
+
 # --------------------------------
 # STAGE 4
 # --------------------------------
@@ -346,132 +138,9 @@ if st.button("Show / Hide uber_analytics_sqlite.sh"):
     st.session_state.show_ats_code = not st.session_state.show_ats_code
     
 if st.session_state.show_ats_code:
-    st.code(
-        """#!/bin/bash
-
-FILE="ncr_ride_bookings_clean.csv"
-DB="ncr_ride_analytics.db"
-
-echo "================ BASIC RIDE ANALYTICS ================"
-
-DATA=$(tail -n +2 "$FILE")
-
-# -------------------------------
-# Initialize SQLite DB
-# -------------------------------
-sqlite3 "$DB" <<EOF
-DROP TABLE IF EXISTS summary_metrics;
-DROP TABLE IF EXISTS ride_status_distribution;
-DROP TABLE IF EXISTS top_pickup_locations;
-DROP TABLE IF EXISTS top_drop_locations;
-DROP TABLE IF EXISTS vehicle_demand;
-DROP TABLE IF EXISTS cancellations;
-DROP TABLE IF EXISTS payment_methods;
-
-CREATE TABLE summary_metrics (
-    metric TEXT,
-    value REAL
-);
-
-CREATE TABLE ride_status_distribution (
-    status TEXT,
-    count INTEGER
-);
-
-CREATE TABLE top_pickup_locations (
-    location TEXT,
-    count INTEGER
-);
-
-CREATE TABLE top_drop_locations (
-    location TEXT,
-    count INTEGER
-);
-
-CREATE TABLE vehicle_demand (
-    vehicle_type TEXT,
-    count INTEGER
-);
-
-CREATE TABLE cancellations (
-    type TEXT,
-    total INTEGER
-);
-
-CREATE TABLE payment_methods (
-    method TEXT,
-    count INTEGER
-);
-EOF
-
-
-TOTAL_BOOKINGS=$(echo "$DATA" | wc -l)
-sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Total Bookings', $TOTAL_BOOKINGS);"
-
-
-echo "$DATA" | awk -F',' '{print $4}' | sort | uniq -c |
-while read count status; do
-    sqlite3 "$DB" "INSERT INTO ride_status_distribution VALUES ('$status', $count);"
-done
-
-
-TOTAL_REVENUE=$(echo "$DATA" | awk -F',' '$4=="Completed"{sum+=$17} END{print sum}')
-sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Total Revenue (Completed)', $TOTAL_REVENUE);"
-
-
-AVG_BOOKING=$(echo "$DATA" | awk -F',' '{sum+=$17;c++} END{print sum/c}')
-sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Average Booking Value', $AVG_BOOKING);"
-
-
-echo "$DATA" | awk -F',' '{print $7}' | sort | uniq -c | sort -nr | head -5 |
-while read count loc; do
-    sqlite3 "$DB" "INSERT INTO top_pickup_locations VALUES ('$loc', $count);"
-done
-
-
-echo "$DATA" | awk -F',' '{print $8}' | sort | uniq -c | sort -nr | head -5 |
-while read count loc; do
-    sqlite3 "$DB" "INSERT INTO top_drop_locations VALUES ('$loc', $count);"
-done
-
-
-echo "$DATA" | awk -F',' '{print $6}' | sort | uniq -c | sort -nr |
-while read count vehicle; do
-    sqlite3 "$DB" "INSERT INTO vehicle_demand VALUES ('$vehicle', $count);"
-done
-
-
-CUST_CANCEL=$(echo "$DATA" | awk -F',' '$11>0{sum+=$11} END{print sum}')
-DRIVER_CANCEL=$(echo "$DATA" | awk -F',' '$13>0{sum+=$13} END{print sum}')
-
-sqlite3 "$DB" "INSERT INTO cancellations VALUES ('Customer', $CUST_CANCEL);"
-sqlite3 "$DB" "INSERT INTO cancellations VALUES ('Driver', $DRIVER_CANCEL);"
-
-
-AVG_DISTANCE=$(echo "$DATA" | awk -F',' '{sum+=$18;c++} END{print sum/c}')
-AVG_DRIVER_RATING=$(echo "$DATA" | awk -F',' '$19!=""{sum+=$19;c++} END{print sum/c}')
-
-sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Average Ride Distance', $AVG_DISTANCE);"
-sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Average Driver Rating', $AVG_DRIVER_RATING);"
+    st.code(load_asset_text("assets/uber_analytics_sqlite.sh"), language="bash")
 
-
-echo "$DATA" | awk -F',' '{print $21}' | sort | uniq -c | sort -nr |
-while read count method; do
-    sqlite3 "$DB" "INSERT INTO payment_methods VALUES ('$method', $count);"
-done
-
-echo "===================================================="
-echo "✅ Analytics successfully stored in SQLite database:"
-echo "   → $DB"
-
-
-""",
-        language="bash"
-    )
-st.image(
-    "images/sqlite.png",
-    use_container_width=True
-)
+show_image("images/sqlite.png")
 
 # --------------------------------
 # STAGE 5
@@ -493,173 +162,9 @@ st.divider()
 
 
 if st.session_state.show_clean_code:
-    st.code(
-        """#!/bin/bash
-
-# ============================================
-# CONFIG
-# ============================================
-INPUT="ncr_ride_bookings_dirty.csv"
-OUTPUT="ncr_ride_bookings_clean.csv"
-TMP="__tmp_clean.csv"
-
-set -e
-
-# ============================================
-# UTILS
-# ============================================
-log() {
-  echo "[INFO] $1"
-}
-
-# ============================================
-# 1. REMOVE LEADING / TRAILING WHITESPACE
-# ============================================
-trim_whitespace() {
-  log "Trimming whitespaces"
-  sed 's/^[ \\t]*//;s/[ \\t]*$//' "$INPUT" > "$TMP"
-}
-
-# ============================================
-# 2. NORMALIZE NULL VALUES
-# ============================================
-normalize_nulls() {
-  log "Normalizing NULL values"
-  sed -i '
-    s/, *,/,/g;
-    s/,,/,NULL,/g;
-    s/^,/NULL,/g;
-    s/,$/,NULL/g;
-    s/\\bNaN\\b/NULL/g;
-    s/\\bnan\\b/NULL/g;
-  ' "$TMP"
-}
-
-# ============================================
-# 3. REMOVE DUPLICATES
-# ============================================
-remove_duplicates() {
-  log "Removing duplicate rows"
-  awk '!seen[$0]++' "$TMP" > "$TMP.dup"
-  mv "$TMP.dup" "$TMP"
-}
-
-# ============================================
-# 4. FIX NEGATIVE NUMERIC VALUES
-# ============================================
-fix_negatives() {
-  log "Fixing negative numeric values"
-  awk -F',' '
-  NR==1 {print; next}
-  {
-    for (i=1; i<=NF; i++) {
-      if ($i ~ /^-[0-9]+(\\.[0-9]+)?$/) {
-        $i = abs($i)
-      }
-    }
-    print
-  }
-  function abs(x){return x<0?-x:x}
-  ' OFS=',' "$TMP" > "$TMP.neg"
-  mv "$TMP.neg" "$TMP"
-}
-
-# ============================================
-# 5. CAP EXTREME OUTLIERS
-# ============================================
-cap_outliers() {
-  log "Capping extreme outliers"
-  awk -F',' '
-  NR==1 {print; next}
-  {
-    for (i=1; i<=NF; i++) {
-      if ($i ~ /^[0-9]+(\\.[0-9]+)?$/ && $i > 1000000) {
-        $i = 1000000
-      }
-    }
-    print
-  }
-  ' OFS=',' "$TMP" > "$TMP.out"
-  mv "$TMP.out" "$TMP"
-}
-
-# ============================================
-# 6. STANDARDIZE TEXT
-# ============================================
-standardize_text() {
-  log "Standardizing text columns"
-  awk -F',' '
-  NR==1 {print; next}
-  {
-    for (i=1; i<=NF; i++) {
-      if ($i ~ /[A-Za-z]/) {
-        gsub(/^[ \\t]+|[ \\t]+$/, "", $i)
-        $i = tolower($i)
-      }
-    }
-    print
-  }
-  ' OFS=',' "$TMP" > "$TMP.txt"
-  mv "$TMP.txt" "$TMP"
-}
-
-# ============================================
-# 7. FINAL SANITY CLEAN
-# ============================================
-final_sanity() {
-  log "Final sanity cleanup"
-  sed -i 's/NULL,NULL/NULL/g' "$TMP"
-}
-
-# ============================================
-# PIPELINE
-# ============================================
-log "Starting cleaning pipeline"
-
-trim_whitespace
-normalize_nulls
-remove_duplicates
-fix_negatives
-cap_outliers
-standardize_text
-final_sanity
-
-mv "$TMP" "$OUTPUT"
-
-log "Cleaning complete → $OUTPUT"
-""",
-        language="bash"
-    )
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    st.code(load_asset_text("assets/cleaning.sh"), language="bash")
 
+report_first_paint("About", page_started)
 
+# Nothing above needs the bookings CSV, so load it for the dashboard after this page has painted.
+start_warm_up()
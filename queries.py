@@ -0,0 +1,357 @@
+import contextlib
+import os
+import sqlite3
+
+import pandas as pd
+
+import locations as geo
+import ratings_stats
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+DB_PATH = "ncr_ride_analytics.db"
+CATALOG_PATH = "partitions/catalog.db"
+
+# Column layout of the cleaned bookings CSV.
+BOOKING_COLUMNS = [
+    "Date", "Time", "Booking ID", "Booking Status", "Customer ID", "Vehicle Type",
+    "Pickup Location", "Drop Location", "Avg VTAT", "Avg CTAT",
+    "Cancelled Rides by Customer", "Reason for cancelling by Customer",
+    "Cancelled Rides by Driver", "Driver Cancellation Reason",
+    "Incomplete Rides", "Incomplete Rides Reason", "Booking Value",
+    "Ride Distance", "Driver Ratings", "Customer Rating", "Payment Method",
+]
+
+# Per-partition top-5 tables and the od_pairs column holding their full counts.
+TOP_LOCATION_COLUMNS = {"top_pickup_locations": "pickup_location", "top_drop_locations": "drop_location"}
+
+# Set by long-running processes (the API) to reuse connections; None opens one per query.
+_pool = None
+
+
+def set_pool(pool):
+    global _pool
+    _pool = pool
+
+# --------------------------------
+# DB HELPERS
+# --------------------------------
+@contextlib.contextmanager
+def connect(path):
+    if _pool is not None:
+        with _pool.connection(path) as conn:
+            yield conn
+        return
+    conn = sqlite3.connect(path)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def load_df(query, params=(), dbs=(DB_PATH,)):
+    frames = []
+    for path in dbs:
+        with connect(path) as conn:
+            frames.append(pd.read_sql(query, conn, params=params))
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def has_table(name, db=DB_PATH):
+    with connect(db) as conn:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+    return row is not None
+
+
+def placeholders(values):
+    return "(" + ",".join("?" * len(values)) + ")"
+
+
+def combine(df, keys):
+    # Re-aggregate additive columns after a query has been fanned out over several partitions.
+    return df.groupby(keys, sort=False, as_index=False).sum(numeric_only=True)
+
+
+def combine_summary(df):
+    # "Total ..." metrics add up across partitions; "Average ..." metrics are weighted by the rows
+    # each was taken over (rated rides for ratings). DBs built before summary_metrics.n existed
+    # fall back to bookings.
+    weight = df["n"].fillna(df["bookings"]) if "n" in df else df["bookings"]
+    df = df.assign(weighted=df["value"] * weight, weight=weight)
+    grouped = df.groupby("metric", sort=False)
+    totals = grouped["value"].sum()
+    averages = grouped["weighted"].sum() / grouped["weight"].sum()
+    is_total = totals.index.str.startswith("Total")
+    value = totals.where(is_total, averages)
+    return value.rename("value").reset_index()
+
+# --------------------------------
+# PARTITION CATALOG
+# --------------------------------
+def read_catalog():
+    if not os.path.exists(CATALOG_PATH):
+        return pd.DataFrame(columns=["city", "month", "csv_path", "db_path", "row_count"])
+    return load_df(
+        "SELECT city, month, csv_path, db_path, row_count FROM partitions ORDER BY city, month",
+        dbs=(CATALOG_PATH,)
+    )
+
+
+def select_partitions(city, first_month, last_month):
+    df = load_df(
+        """SELECT month, csv_path, db_path FROM partitions
+           WHERE city = ? AND month BETWEEN ? AND ?
+           ORDER BY month""",
+        (city, first_month, last_month),
+        (CATALOG_PATH,)
+    )
+    return tuple(df["db_path"]), tuple(df["csv_path"])
+
+# --------------------------------
+# DASHBOARD / API QUERIES
+# --------------------------------
+def distinct(dbs, column, table):
+    if table in TOP_LOCATION_COLUMNS:
+        ranked = _ranked_locations(dbs, table)
+        if ranked is not None:
+            return ranked[column].tolist()
+    return load_df(f"SELECT DISTINCT {column} FROM {table}", dbs=dbs)[column].unique().tolist()
+
+
+def load_rating_store(dbs):
+    # Per-partition stores merge exactly, so any month range gives the same result as one big build.
+    stats, hists = None, None
+    for path in dbs:
+        with connect(path) as conn:
+            s, h = ratings_stats.read_store(conn)
+        stats = s if stats is None else ratings_stats.merge_stats(stats, s)
+        hists = h if hists is None else ratings_stats.merge_histograms(hists, h)
+    stats = stats.assign(ci=ratings_stats.confidence_interval(stats))
+    return stats, hists
+
+
+def kpis(dbs):
+    summary = combine_summary(load_df(
+        """SELECT s.*, b.value AS bookings
+           FROM summary_metrics s, summary_metrics b
+           WHERE b.metric = 'Total Bookings'""",
+        dbs=dbs
+    ))
+    summary["ci"] = None
+    summary["n"] = None
+    if has_table("revenue_segments", dbs[0]):
+        # Exact paise totals; averaging here (not in summary_metrics) keeps partition weights right.
+        overall = revenue(dbs, "all").iloc[0]
+        completed = summary["metric"] == "Total Revenue (Completed)"
+        average = summary["metric"] == "Average Booking Value"
+        summary.loc[completed, ["value", "n"]] = [overall["completed_revenue"], int(overall["completed"])]
+        summary.loc[average, ["value", "n"]] = [overall["avg_value"], int(overall["valued"])]
+    if has_table("rating_stats", dbs[0]):
+        stats, _ = load_rating_store(dbs)
+        overall = stats.loc[("driver", "all", "all")]
+        rating = summary["metric"] == "Average Driver Rating"
+        summary.loc[rating, ["value", "ci", "n"]] = [overall["mean"], overall["ci"], int(overall["n"])]
+    return summary
+
+
+def revenue(dbs, segment):
+    # segment: all / status / vehicle / payment / pickup_location / day, as built by uber_analytics_sqlite.sh
+    df = combine(load_df(
+        """SELECT segment_value, bookings, valued, revenue_paise, completed, completed_paise
+           FROM revenue_segments WHERE segment = ?""",
+        (segment,), dbs
+    ), "segment_value")
+    return df.assign(
+        revenue=df["revenue_paise"] / 100,
+        completed_revenue=df["completed_paise"] / 100,
+        avg_value=(df["revenue_paise"] / df["valued"].where(df["valued"] > 0)) / 100,
+    )
+
+
+def anomalies(dbs, limit=200):
+    # Alerts aren't additive: partitions are just concatenated, newest and strongest first.
+    df = load_df(
+        """SELECT date, hour, pickup_location, metric, value, expected, z FROM anomalies
+           ORDER BY date DESC, ABS(z) DESC LIMIT ?""",
+        (limit,), dbs
+    )
+    df = df.assign(strength=df["z"].abs()).sort_values(["date", "strength"], ascending=False)
+    return df.drop(columns="strength").head(limit)
+
+
+def ride_status(dbs, statuses):
+    return combine(load_df(
+        f"SELECT * FROM ride_status_distribution WHERE status IN {placeholders(statuses)}",
+        tuple(statuses), dbs
+    ), "status")
+
+
+def vehicle_demand(dbs, vehicles):
+    return combine(load_df(
+        f"SELECT * FROM vehicle_demand WHERE vehicle_type IN {placeholders(vehicles)}",
+        tuple(vehicles), dbs
+    ), "vehicle_type")
+
+
+def _ranked_locations(dbs, table, limit=5):
+    # Each partition only keeps its own top 5, and merging those is approximate; od_pairs has
+    # every location's full count, so the ranking over several partitions is taken from it.
+    if len(dbs) == 1 or not has_table("od_pairs", dbs[0]):
+        return None
+    column = TOP_LOCATION_COLUMNS[table]
+    return combine(load_df(
+        f"SELECT {column} AS location, SUM(trips) AS count FROM od_pairs GROUP BY {column}",
+        dbs=dbs
+    ), "location").nlargest(limit, "count")
+
+
+def _top_locations(dbs, table, locations):
+    ranked = _ranked_locations(dbs, table)
+    if ranked is not None:
+        return ranked[ranked["location"].isin(locations)]
+    return combine(load_df(
+        f"SELECT * FROM {table} WHERE location IN {placeholders(locations)}",
+        tuple(locations), dbs
+    ), "location")
+
+
+def top_pickups(dbs, locations):
+    return _top_locations(dbs, "top_pickup_locations", locations)
+
+
+def top_drops(dbs, locations):
+    return _top_locations(dbs, "top_drop_locations", locations)
+
+
+def payment_methods(dbs, methods):
+    return combine(load_df(
+        f"SELECT * FROM payment_methods WHERE method IN {placeholders(methods)}",
+        tuple(methods), dbs
+    ), "method")
+
+
+def cancellations(dbs):
+    return combine(load_df("SELECT * FROM cancellations", dbs=dbs), "type")
+
+
+def cancellation_reasons(dbs, canceller, vehicles):
+    return combine(load_df(
+        f"""SELECT reason, SUM(total) AS total FROM cancellation_facts
+            WHERE canceller = ? AND vehicle_type IN {placeholders(vehicles)}
+            GROUP BY reason""",
+        (canceller, *vehicles), dbs
+    ), "reason").sort_values("total", ascending=False)
+
+
+def _cancellation_breakdown(dbs, column, canceller, reason, vehicles):
+    reason_filter = "" if reason is None else "AND reason = ?"
+    params = (canceller,) + (() if reason is None else (reason,)) + tuple(vehicles)
+    return combine(load_df(
+        f"""SELECT {column}, SUM(total) AS total FROM cancellation_facts
+            WHERE canceller = ? {reason_filter} AND vehicle_type IN {placeholders(vehicles)}
+            GROUP BY {column}""",
+        params, dbs
+    ), column)
+
+
+def cancellation_zones(dbs, canceller, reason, vehicles, limit=10):
+    return _cancellation_breakdown(dbs, "pickup_location", canceller, reason, vehicles).nlargest(limit, "total")
+
+
+def cancellation_hours(dbs, canceller, reason, vehicles):
+    return _cancellation_breakdown(dbs, "hour", canceller, reason, vehicles).sort_values("hour")
+
+
+def daily_rides(dbs, statuses, vehicles):
+    return combine(load_df(
+        f"""SELECT date, SUM(rides) AS rides FROM daily_rides
+            WHERE status IN {placeholders(statuses)} AND vehicle_type IN {placeholders(vehicles)}
+            GROUP BY date""",
+        (*statuses, *vehicles), dbs
+    ), "date").sort_values("date")
+
+
+def od_pairs(dbs, statuses, vehicles, pickups=None, drops=None, limit=50):
+    # pickups/drops of None mean "any location": the sidebar lists only hold the top-5s.
+    where = [f"status IN {placeholders(statuses)}", f"vehicle_type IN {placeholders(vehicles)}"]
+    params = [*statuses, *vehicles]
+    if pickups is not None:
+        where.append(f"pickup_location IN {placeholders(pickups)}")
+        params += pickups
+    if drops is not None:
+        where.append(f"drop_location IN {placeholders(drops)}")
+        params += drops
+    return combine(load_df(
+        f"""SELECT pickup_location, drop_location, SUM(trips) AS trips FROM od_pairs
+            WHERE {" AND ".join(where)}
+            GROUP BY pickup_location, drop_location""",
+        tuple(params), dbs
+    ), ["pickup_location", "drop_location"]).nlargest(limit, "trips")
+
+
+def locations(dbs):
+    return load_df("SELECT name, lat, lon, zone FROM location_dim", dbs=dbs).drop_duplicates("name")
+
+
+def zone_pickups(dbs):
+    trips = combine(load_df(
+        """SELECT d.name, SUM(o.trips) AS trips
+           FROM od_bands o JOIN location_dim d ON d.location_id = o.pickup_id
+           GROUP BY o.pickup_id""",
+        dbs=dbs
+    ), "name")
+    return locations(dbs).merge(trips, on="name")
+
+
+def zone_bands(dbs):
+    return combine(load_df(
+        """SELECT d.zone, o.band, SUM(o.trips) AS trips
+           FROM od_bands o JOIN location_dim d ON d.location_id = o.pickup_id
+           GROUP BY d.zone, o.band""",
+        dbs=dbs
+    ), ["zone", "band"])
+
+
+def rides_within(dbs, name, km):
+    # Seeded locations share IDs and centroids across partitions; names outside the seed have no
+    # centroid and so no radius.
+    center = load_df("SELECT lat, lon FROM location_dim WHERE name = ? AND lat IS NOT NULL", (name,), dbs)
+    if center.empty:
+        return pd.DataFrame(columns=["name", "zone", "lat", "lon", "km", "trips"]).astype({"trips": "int64"})
+    center = center.iloc[0]
+    min_lat, max_lat, min_lon, max_lon = geo.bounding_box(center["lat"], center["lon"], km)
+    if all(has_table("location_rtree", db) for db in dbs):
+        nearby = load_df(
+            """SELECT d.name, d.zone, d.lat, d.lon
+               FROM location_rtree r JOIN location_dim d ON d.location_id = r.location_id
+               WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lon >= ? AND r.min_lon <= ?""",
+            (min_lat, max_lat, min_lon, max_lon), dbs
+        )
+    else:
+        cells = [int(v // geo.GRID_DEGREES) for v in (min_lon, max_lon, min_lat, max_lat)]
+        nearby = load_df(
+            """SELECT name, zone, lat, lon FROM location_dim
+               WHERE cell_x BETWEEN ? AND ? AND cell_y BETWEEN ? AND ?""",
+            tuple(cells), dbs
+        )
+    nearby = nearby.drop_duplicates("name", ignore_index=True)
+    # The box over-covers the circle; trim its corners exactly.
+    nearby = nearby.assign(km=geo.haversine_km(center["lat"], center["lon"], nearby["lat"], nearby["lon"]))
+    nearby = nearby[nearby["km"] <= km]
+    if nearby.empty:
+        return nearby.assign(trips=0)
+    names = nearby["name"].tolist()
+    trips = combine(load_df(
+        f"""SELECT d.name, SUM(o.trips) AS trips
+            FROM location_dim d JOIN od_bands o ON o.pickup_id = d.location_id
+            WHERE d.name IN {placeholders(names)}
+            GROUP BY d.name""",
+        tuple(names), dbs
+    ), "name")
+    nearby = nearby.merge(trips, on="name", how="left").fillna({"trips": 0})
+    return nearby.astype({"trips": "int64"}).sort_values("km")
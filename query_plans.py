@@ -0,0 +1,313 @@
+import argparse
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+
+import queries
+from bench_query_engines import dataset
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+DEFAULT_ROWS = 1_000_000
+REPEAT = 5
+# Below this many rows a full scan is as cheap as any index probe (status lists, KPI rows, ...).
+SMALL_TABLE_ROWS = 1_000
+# Modules whose functions own SQL; a statement is attributed to the innermost of them
+# on the stack, skipping the generic helpers that only run what they are handed.
+CALLER_FILES = ("queries.py", "ratings_stats.py", "api.py", "data.py", "Analysis.py")
+HELPERS = {"connect", "load_df", "has_table"}
+
+# Scans that are the right plan, keyed by (caller, table), with the reason. Anything else
+# scanning a large table fails the run.
+ALLOWED_SCANS = {
+    ("ratings_stats.read_store", "rating_histogram"):
+        "loads the whole mergeable store; sized by segments x bins, not by bookings",
+    ("ratings_stats.read_store", "rating_stats"):
+        "loads the whole mergeable store; one row per segment value",
+}
+
+INDEX_DDL = re.compile(r"^CREATE INDEX (\w+) ON (\w+)\((.*)\)$")
+PLAN_LINE = re.compile(r"^(SCAN|SEARCH) (\w+)(?: AS \w+)?(?: USING (COVERING )?(?:INDEX|PRIMARY KEY|INTEGER PRIMARY KEY)\b)?")
+
+# --------------------------------
+# CAPTURE (every statement the dashboard and API issue, with its caller)
+# --------------------------------
+class TracingPool:
+    """queries.set_pool() stand-in: one connection per DB, each statement recorded with its callers."""
+
+    def __init__(self):
+        self.statements = {}
+        self._conns = {}
+
+    @contextlib.contextmanager
+    def connection(self, path):
+        conn = self._conns.get(path)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            conn.set_trace_callback(lambda sql, path=path: self._record(path, sql))
+            self._conns[path] = conn
+        yield conn
+
+    def _record(self, path, sql):
+        sql = " ".join(sql.split())
+        if not sql.upper().startswith(("SELECT", "WITH")):
+            return
+        entry = self.statements.setdefault(sql, {"db": path, "callers": set(), "calls": 0})
+        entry["callers"].add(owner(sys._getframe(1)))
+        entry["calls"] += 1
+
+    def close(self):
+        for conn in self._conns.values():
+            conn.close()
+        self._conns.clear()
+
+
+def owner(frame):
+    # Innermost function that wrote the SQL: kpis -> revenue -> load_df is "queries.revenue".
+    while frame is not None:
+        module = os.path.basename(frame.f_code.co_filename)
+        name = frame.f_code.co_name
+        if module in CALLER_FILES and name not in HELPERS:
+            return module[:-3] if name == "<module>" else f"{module[:-3]}.{name}"
+        frame = frame.f_back
+    return "?"
+
+
+def run_dashboard(db):
+    from streamlit.logger import set_log_level
+    from streamlit.testing.v1 import AppTest
+
+    import data
+
+    # No CSV either: only the SQLite-backed sections are of interest here.
+    data.DB_PATH = db
+    data.CSV_PATH = os.path.join(os.path.dirname(db), "missing.csv")
+    set_log_level("error")
+    main = sys.modules["__main__"]
+    try:
+        at = AppTest.from_file("Analysis.py", default_timeout=600).run()
+    finally:
+        # The script runner leaves the page installed as __main__, which any process spawned
+        # later (bench_shared_memory, a pytest session) would re-run on start-up.
+        sys.modules["__main__"] = main
+    return [e.value for e in at.exception]
+
+
+def run_api(db):
+    import api
+
+    requests = [
+        (api.kpis, {}), (api.timeseries, {}), (api.od_pairs, {}), (api.anomalies, {}),
+        *[(api.distribution, {"kind": k}) for k in ("status", "vehicle", "payment", "cancellations")],
+        *[(api.top_locations, {"kind": k}) for k in ("pickup", "drop")],
+        *[(api.revenue, {"segment": s}) for s in ("all", "status", "vehicle", "payment", "pickup_location", "day")],
+    ]
+    for handler, args in requests:
+        explicit = {name: None for name in api.FILTERS}
+        api.build_body(handler, args, explicit, "plans")
+
+
+def run_variants(db):
+    # Branches the dashboard's default widget state never takes.
+    dbs = (db,)
+    vehicles = queries.distinct(dbs, "vehicle_type", "vehicle_demand")
+    statuses = queries.distinct(dbs, "status", "ride_status_distribution")
+    for canceller in ("Customer", "Driver"):
+        reason = queries.cancellation_reasons(dbs, canceller, vehicles)["reason"].iloc[0]
+        queries.cancellation_zones(dbs, canceller, reason, vehicles)
+        queries.cancellation_hours(dbs, canceller, reason, vehicles)
+    # Locations that actually have trips, so every filtered variant returns rows.
+    top = queries.od_pairs(dbs, statuses, vehicles)
+    pickups = top["pickup_location"].unique().tolist()[:3]
+    drops = top["drop_location"].unique().tolist()[:3]
+    queries.od_pairs(dbs, statuses, vehicles, pickups, None)
+    queries.od_pairs(dbs, statuses, vehicles, None, drops)
+    queries.od_pairs(dbs, statuses, vehicles[:2], pickups, drops)
+    queries.rides_within(dbs, pickups[0], 25)
+
+
+def capture(db):
+    # api installs its own pool when first imported; the tracing pool has to go in after it.
+    import api
+
+    pool = TracingPool()
+    queries.set_pool(pool)
+    # No catalog: both the API and the dashboard fall back to the single DB under test.
+    queries.DB_PATH = db
+    queries.CATALOG_PATH = os.path.join(os.path.dirname(db), "missing_catalog.db")
+    try:
+        errors = run_dashboard(db)
+        run_api(db)
+        run_variants(db)
+    finally:
+        queries.set_pool(None)
+        pool.close()
+    return pool.statements, errors
+
+# --------------------------------
+# PLANS, TIMINGS, ADVICE
+# --------------------------------
+def explain(conn, sql):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+
+def table_rows(conn, table, cache):
+    if table not in cache:
+        try:
+            cache[table] = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        except sqlite3.Error:
+            cache[table] = 0        # subquery/CTE names, virtual tables
+    return cache[table]
+
+
+def scans(plan, conn, cache):
+    """Full scans of large tables: plain SCAN, or a non-covering index walked end to end."""
+    found = []
+    for detail in plan:
+        m = PLAN_LINE.match(detail)
+        if not m or m.group(1) != "SCAN" or "VIRTUAL TABLE" in detail:
+            continue
+        if m.group(3):          # SCAN ... USING COVERING INDEX: reads the index only
+            continue
+        table = m.group(2)
+        if table_rows(conn, table, cache) > SMALL_TABLE_ROWS:
+            found.append(table)
+    return found
+
+
+def timing(conn, sql, repeat=REPEAT):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql).fetchall()
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs) * 1000
+
+
+def expert(db, sql):
+    # SQLite's own index advisor (the sqlite3 shell's .expert mode).
+    try:
+        out = subprocess.run(["sqlite3", db], input=f".expert\n{sql};\n",
+                             capture_output=True, text=True, timeout=120).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return []
+    return [line.rstrip(";") for line in out.splitlines() if line.startswith("CREATE INDEX")]
+
+
+def cover(conn, sql, ddl):
+    # .expert proposes the search key only; trailing the other columns the statement reads
+    # from that table lets SQLite answer from the index without touching the rows.
+    m = INDEX_DDL.match(ddl)
+    if not m:
+        return ddl
+    name, table, key = m.groups()
+    keyed = {c.strip().split()[0].lower() for c in key.split(",")}
+    words = set(re.findall(r"\w+", sql.lower()))
+    extra = [c for _, c, *_ in conn.execute(f'PRAGMA table_info("{table}")')
+             if c.lower() in words and c.lower() not in keyed]
+    return f"CREATE INDEX {name} ON {table}({', '.join([key] + extra)})" if extra else ddl
+
+
+def verify(conn, sql, indexes):
+    # DDL is transactional in SQLite: build the suggestion, re-plan and re-time, roll back.
+    conn.execute("BEGIN")
+    try:
+        for ddl in indexes:
+            conn.execute(ddl)
+        return explain(conn, sql), timing(conn, sql)
+    finally:
+        conn.execute("ROLLBACK")
+
+
+def analyse(db, statements, advise_all=False):
+    conn = sqlite3.connect(db, isolation_level=None)
+    cache = {}
+    report = []
+    for sql, entry in sorted(statements.items(), key=lambda kv: sorted(kv[1]["callers"])):
+        plan = explain(conn, sql)
+        bad = [t for t in scans(plan, conn, cache)
+               if not all((c, t) in ALLOWED_SCANS for c in entry["callers"])]
+        record = {
+            "callers": sorted(entry["callers"]), "sql": sql, "calls": entry["calls"],
+            "plan": plan, "ms": timing(conn, sql), "full_scans": bad,
+            "temp_btree": any("TEMP B-TREE" in d for d in plan),
+        }
+        if bad or (advise_all and (record["temp_btree"] or scans(plan, conn, cache))):
+            record["advice"] = [cover(conn, sql, ddl) for ddl in expert(db, sql)]
+            if record["advice"]:
+                record["advised_plan"], record["advised_ms"] = verify(conn, sql, record["advice"])
+        report.append(record)
+    conn.close()
+    return report
+
+# --------------------------------
+# DRIVER
+# --------------------------------
+def build(rows, workdir, rebuild):
+    csv = dataset(rows, workdir)
+    db = os.path.join(workdir, f"plans_{rows}.db")
+    if rebuild or not os.path.exists(db):
+        tmp = db + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        # Same isolation as bench_query_engines: keep the build's shared-dataset publish in workdir.
+        env = {**os.environ, "SHARED_DATASET_DIR": os.path.join(workdir, "shared")}
+        subprocess.run(["bash", "uber_analytics_sqlite.sh", csv, tmp], check=True, stdout=subprocess.DEVNULL, env=env)
+        os.replace(tmp, db)
+    return db
+
+
+def print_report(report):
+    for r in report:
+        status = "FAIL" if r["full_scans"] else "ok"
+        print(f"{status:<5} {r['ms']:>8.2f}ms  {', '.join(r['callers'])}")
+        for detail in r["plan"]:
+            print(f"{'':>17}{detail}")
+        if r.get("advice"):
+            for ddl in r["advice"]:
+                print(f"{'':>17}+ {ddl}")
+            print(f"{'':>17}  → {' | '.join(r['advised_plan'])}  ({r['advised_ms']:.2f}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN every dashboard/API query on a large generated DB; fail on full scans")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--workdir", default="bench")
+    parser.add_argument("--db", help="check this analytics DB instead of generating one")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the generated DB")
+    parser.add_argument("--advise-all", action="store_true",
+                        help="also ask for indexes where a plan sorts in a temp b-tree or scans a small table")
+    parser.add_argument("--json", help="also write the full report here")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    db = os.path.abspath(args.db or build(args.rows, args.workdir, args.rebuild))
+    statements, errors = capture(db)
+    report = analyse(db, statements, args.advise_all)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = [r for r in report if r["full_scans"]]
+    callers = {c for r in report for c in r["callers"]}
+    print(f"[INFO] {len(report)} distinct statements from {len(callers)} callers, "
+          f"{sum(r['ms'] for r in report):.1f}ms total on {db}")
+    for e in errors:
+        print(f"[ERROR] dashboard raised: {e}")
+    if failures:
+        print(f"[FAIL] {len(failures)} statement(s) scan a large table: "
+              + ", ".join(sorted({f"{c} ({t})" for r in failures for c in r["callers"] for t in r["full_scans"]})))
+    if failures or errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+RATINGS = {
+    "driver": "Driver Ratings",
+    "customer": "Customer Rating",
+}
+
+# segment name -> CSV column (None = one overall row)
+SEGMENTS = {
+    "all": None,
+    "vehicle": "Vehicle Type",
+    "pickup_location": "Pickup Location",
+    "day": "Date",
+}
+
+NULL_TOKENS = ["NULL", "null", "NaN", "nan", ""]
+BIN_WIDTH = 0.25
+N_BINS = 20
+CHUNK_ROWS = 200_000
+STAT_COLUMNS = ["n", "mean", "m2", "min", "max"]
+KEYS = ["rating", "segment", "segment_value"]
+
+# --------------------------------
+# MERGEABLE STATS
+# --------------------------------
+def chunk_stats(values, keys):
+    out = values.groupby(keys).agg(["count", "mean", "var", "min", "max"])
+    out.columns = STAT_COLUMNS
+    out["m2"] = out["m2"].fillna(0.0) * (out["n"] - 1)
+    return out
+
+
+def merge_stats(a, b):
+    # Chan et al. pairwise update, applied to every segment at once.
+    index = a.index.union(b.index)
+    a = a.reindex(index)
+    b = b.reindex(index)
+    na = a["n"].fillna(0)
+    nb = b["n"].fillna(0)
+    n = na + nb
+    delta = b["mean"].fillna(0) - a["mean"].fillna(0)
+    return pd.DataFrame({
+        "n": n.astype("int64"),
+        "mean": a["mean"].fillna(0) + delta * nb / n,
+        "m2": a["m2"].fillna(0) + b["m2"].fillna(0) + delta ** 2 * na * nb / n,
+        "min": np.fmin(a["min"], b["min"]),
+        "max": np.fmax(a["max"], b["max"]),
+    }, index=index)
+
+
+def merge_histograms(a, b):
+    return a.add(b, fill_value=0).astype("int64")
+
+
+def confidence_interval(stats, z=1.96):
+    # Half-width of the normal-approximation CI for the mean.
+    std = np.sqrt(stats["m2"] / (stats["n"] - 1).where(stats["n"] > 1))
+    return (z * std / np.sqrt(stats["n"])).fillna(0.0)
+
+# --------------------------------
+# INGESTION
+# --------------------------------
+def summarize_chunk(chunk):
+    stats, hists = [], []
+    for rating, column in RATINGS.items():
+        values = pd.to_numeric(chunk[column], errors="coerce")
+        valid = values.notna()
+        values = values[valid]
+        bins = np.minimum((values // BIN_WIDTH).astype("int64"), N_BINS - 1).clip(lower=0)
+        for segment, segment_column in SEGMENTS.items():
+            if segment_column is None:
+                segment_values = pd.Series("all", index=values.index)
+            else:
+                segment_values = chunk.loc[valid, segment_column].astype(str)
+            s = chunk_stats(values, segment_values)
+            s.index = pd.MultiIndex.from_product([[rating], [segment], s.index], names=KEYS)
+            stats.append(s)
+            h = bins.groupby([segment_values, bins]).size()
+            h.index = pd.MultiIndex.from_tuples(
+                [(rating, segment, value, b) for value, b in h.index], names=KEYS + ["bin"]
+            )
+            hists.append(h)
+    return pd.concat(stats), pd.concat(hists)
+
+
+def build(path):
+    stats, hists = None, None
+    usecols = list(RATINGS.values()) + [c for c in SEGMENTS.values() if c]
+    for chunk in pd.read_csv(path, usecols=usecols, na_values=NULL_TOKENS,
+                             dtype=str, chunksize=CHUNK_ROWS):
+        s, h = summarize_chunk(chunk)
+        stats = s if stats is None else merge_stats(stats, s)
+        hists = h if hists is None else merge_histograms(hists, h)
+    if stats is None:
+        raise SystemExit(f"[ERROR] {path} has no rows")
+    return stats, hists
+
+# --------------------------------
+# STORAGE
+# --------------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rating_stats (
+    rating TEXT,
+    segment TEXT,
+    segment_value TEXT,
+    n INTEGER,
+    mean REAL,
+    m2 REAL,
+    min REAL,
+    max REAL,
+    PRIMARY KEY (rating, segment, segment_value)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rating_histogram (
+    rating TEXT,
+    segment TEXT,
+    segment_value TEXT,
+    bin INTEGER,
+    count INTEGER,
+    PRIMARY KEY (rating, segment, segment_value, bin)
+) WITHOUT ROWID;
+"""
+
+
+def read_store(conn):
+    stats = pd.read_sql("SELECT * FROM rating_stats", conn).set_index(KEYS)
+    hists = pd.read_sql("SELECT * FROM rating_histogram", conn).set_index(KEYS + ["bin"])["count"]
+    return stats, hists
+
+
+def write_store(conn, stats, hists, append=False):
+    conn.executescript(SCHEMA)
+    if append:
+        old_stats, old_hists = read_store(conn)
+        stats = merge_stats(old_stats, stats)
+        hists = merge_histograms(old_hists, hists)
+    with conn:
+        conn.execute("DELETE FROM rating_stats")
+        conn.execute("DELETE FROM rating_histogram")
+        conn.executemany(
+            "INSERT INTO rating_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            stats.reset_index()[KEYS + STAT_COLUMNS].itertuples(index=False)
+        )
+        conn.executemany(
+            "INSERT INTO rating_histogram VALUES (?, ?, ?, ?, ?)",
+            hists.rename("count").reset_index().itertuples(index=False)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-segment rating statistics")
+    parser.add_argument("csv")
+    parser.add_argument("db")
+    parser.add_argument("--append", action="store_true",
+                        help="merge this batch into the existing store instead of replacing it")
+    args = parser.parse_args()
+
+    stats, hists = build(args.csv)
+    conn = sqlite3.connect(args.db)
+    write_store(conn, stats, hists, append=args.append)
+    conn.close()
+    print(f"[INFO] Rating stats: {len(stats)} segments, {len(hists)} histogram bins → {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import argparse
+import atexit
+import hashlib
+import os
+import shutil
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+# One directory per cleaned CSV:  <root>/<stem>-<hash>/CURRENT  names the live version,
+# <version>/bookings.arrow holds the typed columns and <version>/readers/<pid> the leases.
+SHARED_ROOT = os.environ.get("SHARED_DATASET_DIR", "shared")
+DATA_FILE = "bookings.arrow"
+BATCH_ROWS = 1 << 20
+
+# --------------------------------
+# TYPING (shared with data.load_partition_csv)
+# --------------------------------
+def prepare(df):
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["DayOfWeek"] = df["Date"].dt.day_name()
+    df["Hour"] = pd.to_datetime(df["Time"], format="%H:%M:%S", errors="coerce").dt.hour
+    return df
+
+
+def dataset_dir(csv, root=SHARED_ROOT):
+    stem = os.path.splitext(os.path.basename(csv))[0]
+    digest = hashlib.sha1(os.path.abspath(csv).encode()).hexdigest()[:12]
+    return os.path.join(root, f"{stem}-{digest}")
+
+
+def source_version(csv):
+    # Rebuilding the CSV changes its mtime/size, and with it the version name.
+    st = os.stat(csv)
+    return f"v{st.st_mtime_ns}-{st.st_size}"
+
+# --------------------------------
+# PUBLISH / COLLECT (pipeline side)
+# --------------------------------
+def current_version(csv, root=SHARED_ROOT):
+    try:
+        with open(os.path.join(dataset_dir(csv, root), "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publish(csv, root=SHARED_ROOT):
+    """Write the typed dataset as an Arrow IPC file and atomically point CURRENT at it."""
+    base = dataset_dir(csv, root)
+    version = source_version(csv)
+    if current_version(csv, root) == version:
+        return version, False
+    staging = os.path.join(base, f".{version}.{os.getpid()}")
+    os.makedirs(os.path.join(staging, "readers"), exist_ok=True)
+    table = pa.Table.from_pandas(prepare(pd.read_csv(csv)), preserve_index=False)
+    with pa.OSFile(os.path.join(staging, DATA_FILE), "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=BATCH_ROWS)
+    target = os.path.join(base, version)
+    if os.path.exists(target):
+        shutil.rmtree(staging)
+    else:
+        os.rename(staging, target)
+    pointer = os.path.join(base, f".CURRENT.{os.getpid()}")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(base, "CURRENT"))
+    collect(csv, root)
+    return version, True
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def live_readers(path):
+    readers = os.path.join(path, "readers")
+    if not os.path.isdir(readers):
+        return []
+    pids = []
+    for name in os.listdir(readers):
+        if name.isdigit() and _alive(int(name)):
+            pids.append(int(name))
+        else:
+            # Lease left behind by a process that died without releasing it.
+            os.remove(os.path.join(readers, name))
+    return pids
+
+
+def collect(csv, root=SHARED_ROOT):
+    """Delete superseded versions that no live process still maps."""
+    base = dataset_dir(csv, root)
+    current = current_version(csv, root)
+    removed = []
+    for version in os.listdir(base):
+        path = os.path.join(base, version)
+        if version == current or version.startswith(".") or not os.path.isdir(path):
+            continue
+        if not live_readers(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(version)
+    return removed
+
+# --------------------------------
+# ATTACH / RELEASE (reader side, reference-counted per process)
+# --------------------------------
+# Re-entrant: latest() holds it across its lookup, acquire() and release().
+_lock = threading.RLock()
+_mapped = {}        # version path -> {"frame": DataFrame, "refs": int}
+_following = {}     # dataset dir -> version path held on behalf of latest()
+
+
+def _lease(path):
+    return os.path.join(path, "readers", str(os.getpid()))
+
+
+def _attach(path):
+    # Zero-copy: ArrowDtype columns wrap the mapped buffers, so every process shares the page cache.
+    table = ipc.open_file(pa.memory_map(os.path.join(path, DATA_FILE))).read_all()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def acquire(csv, root=SHARED_ROOT):
+    """Map the current version (once per process) and take a reference. Returns (version path, frame)."""
+    version = current_version(csv, root)
+    if version is None:
+        return None, None
+    path = os.path.join(dataset_dir(csv, root), version)
+    with _lock:
+        entry = _mapped.get(path)
+        if entry is None:
+            open(_lease(path), "w").close()
+            try:
+                entry = _mapped[path] = {"frame": _attach(path), "refs": 0}
+            except FileNotFoundError:
+                os.remove(_lease(path))
+                return None, None
+        entry["refs"] += 1
+        return path, entry["frame"]
+
+
+def release(path):
+    # Frames already handed out stay valid (they keep the mapping alive); the lease only
+    # tells publishers this process no longer needs the version, so it can be collected.
+    with _lock:
+        entry = _mapped.get(path)
+        if entry is None:
+            return
+        entry["refs"] -= 1
+        if entry["refs"] <= 0:
+            del _mapped[path]
+            try:
+                os.remove(_lease(path))
+            except FileNotFoundError:
+                pass
+
+
+def latest(csv, root=SHARED_ROOT):
+    """Frame for the newest published version, swapping (and releasing the old one) on reload.
+
+    None when nothing is published, or when the CSV was rebuilt after the last publish.
+    """
+    base = dataset_dir(csv, root)
+    with _lock:
+        version = current_version(csv, root)
+        if version is not None and os.path.exists(csv) and version != source_version(csv):
+            version = None
+        if version is None:
+            if base in _following:
+                release(_following.pop(base))
+            return None
+        held = _following.get(base)
+        if held is not None and os.path.basename(held) == version:
+            return _mapped[held]["frame"]
+        path, frame = acquire(csv, root)
+        if path is None:
+            return None
+        if _following.get(base) not in (None, path):
+            release(_following[base])
+        _following[base] = path
+        return frame
+
+
+@atexit.register
+def _release_all():
+    for path in list(_mapped):
+        try:
+            os.remove(_lease(path))
+        except FileNotFoundError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish cleaned bookings as a shared memory-mapped dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("publish", help="write a new version for each CSV and switch readers to it")
+    p.add_argument("csv", nargs="+")
+    c = sub.add_parser("collect", help="delete superseded versions no process is reading")
+    c.add_argument("csv", nargs="+")
+    parser.add_argument("--root", default=SHARED_ROOT)
+    args = parser.parse_args()
+
+    for csv in args.csv:
+        if args.command == "publish":
+            version, written = publish(csv, args.root)
+            state = "published" if written else "unchanged"
+            print(f"[INFO] Shared dataset {state}: {csv} → {os.path.join(dataset_dir(csv, args.root), version)}")
+        else:
+            removed = collect(csv, args.root)
+            print(f"[INFO] Collected {len(removed)} superseded version(s) of {csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+import zipfile
+
+# --------------------------------
+# CONFIG
+# --------------------------------
+# 2: BLOB values are written as {"b64": ...} (format 1 had no way to store them).
+FORMAT_VERSION = 2
+DB_PATH = "ncr_ride_analytics.db"
+CATALOG_PATH = "partitions/catalog.db"
+MANIFEST = "manifest.json"
+BATCH_ROWS = 50_000
+
+# --------------------------------
+# HELPERS
+# --------------------------------
+def source_dbs(root):
+    # The main analytics DB, plus the partition catalog and every partition it lists.
+    dbs = []
+    if os.path.exists(os.path.join(root, DB_PATH)):
+        dbs.append(DB_PATH)
+    catalog = os.path.join(root, CATALOG_PATH)
+    if os.path.exists(catalog):
+        dbs.append(CATALOG_PATH)
+        conn = sqlite3.connect(catalog)
+        dbs += [path for (path,) in conn.execute("SELECT db_path FROM partitions ORDER BY city, month")]
+        conn.close()
+    return dbs
+
+
+def schema_objects(conn):
+    # Shadow tables (e.g. an R*Tree's _node/_parent/_rowid) are recreated by their virtual table.
+    shadow = {row[1] for row in conn.execute("PRAGMA table_list") if row[2] == "shadow"}
+    tables = [
+        (name, sql) for name, sql in conn.execute(
+            """SELECT name, sql FROM sqlite_master
+               WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"""
+        )
+        if name not in shadow
+    ]
+    indexes = conn.execute(
+        """SELECT tbl_name, sql FROM sqlite_master
+           WHERE type = 'index' AND sql IS NOT NULL ORDER BY name"""
+    ).fetchall()
+    return tables, indexes
+
+
+def fingerprint(statements):
+    ddl = "\n".join(" ".join(sql.split()) for sql in statements)
+    return hashlib.sha256(ddl.encode()).hexdigest()[:16]
+
+
+def schema_version(conn):
+    # Fingerprint of every CREATE statement, so an app can tell which pipeline built the data.
+    tables, indexes = schema_objects(conn)
+    return fingerprint([sql for _, sql in tables + indexes])
+
+
+def table_columns(conn):
+    tables, _ = schema_objects(conn)
+    return {name: {row[1] for row in conn.execute(f'PRAGMA table_info("{name}")')} for name, _ in tables}
+
+
+def encode_value(value):
+    # JSON has no bytes; the wrapper can't clash with anything else SQLite returns.
+    return {"b64": base64.b64encode(value).decode("ascii")} if isinstance(value, bytes) else value
+
+
+def decode_value(value):
+    return base64.b64decode(value["b64"]) if isinstance(value, dict) else value
+
+# --------------------------------
+# EXPORT
+# --------------------------------
+def export_snapshot(out, root="."):
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "databases": [],
+    }
+    tmp = out + ".tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for db in source_dbs(root):
+            conn = sqlite3.connect(os.path.join(root, db))
+            tables, indexes = schema_objects(conn)
+            entry = {
+                "path": db,
+                "schema_version": schema_version(conn),
+                "tables": [],
+                "indexes": [sql for _, sql in indexes],
+            }
+            for name, sql in tables:
+                member = f"{db}/{name}.jsonl"
+                digest = hashlib.sha256()
+                rows = 0
+                with zf.open(member, "w") as raw:
+                    cursor = conn.execute(f'SELECT * FROM "{name}"')
+                    while True:
+                        batch = cursor.fetchmany(BATCH_ROWS)
+                        if not batch:
+                            break
+                        data = "".join(json.dumps([encode_value(v) for v in row]) + "\n" for row in batch).encode()
+                        digest.update(data)
+                        raw.write(data)
+                        rows += len(batch)
+                entry["tables"].append({
+                    "name": name,
+                    "sql": sql,
+                    "member": member,
+                    "rows": rows,
+                    "sha256": digest.hexdigest(),
+                })
+            conn.close()
+            manifest["databases"].append(entry)
+        payload = json.dumps(manifest, indent=2).encode()
+        zf.writestr(MANIFEST, payload)
+    os.replace(tmp, out)
+    return manifest
+
+# --------------------------------
+# IMPORT
+# --------------------------------
+def read_manifest(zf):
+    manifest = json.loads(zf.read(MANIFEST))
+    if manifest["format_version"] > FORMAT_VERSION:
+        raise SystemExit(
+            f"[ERROR] Snapshot format {manifest['format_version']} is newer than supported ({FORMAT_VERSION})"
+        )
+    return manifest
+
+
+def load_table(conn, zf, table):
+    digest = hashlib.sha256()
+    rows = 0
+    with zf.open(table["member"]) as raw:
+        reader = io.TextIOWrapper(raw, encoding="utf-8")
+        batch = []
+        for line in reader:
+            digest.update(line.encode())
+            batch.append([decode_value(v) for v in json.loads(line)])
+            if len(batch) == BATCH_ROWS:
+                rows += insert_rows(conn, table["name"], batch)
+                batch = []
+        rows += insert_rows(conn, table["name"], batch)
+    if digest.hexdigest() != table["sha256"] or rows != table["rows"]:
+        raise SystemExit(f"[ERROR] Checksum mismatch for {table['member']}")
+
+
+def insert_rows(conn, name, batch):
+    if batch:
+        marks = ",".join("?" * len(batch[0]))
+        conn.executemany(f'INSERT INTO "{name}" VALUES ({marks})', batch)
+    return len(batch)
+
+
+def check_schema(entry, root, force=False):
+    """Refuse a DB whose DDL doesn't match its schema_version, or that drops what the current one has."""
+    ddl = [t["sql"] for t in entry["tables"]] + entry["indexes"]
+    if fingerprint(ddl) != entry["schema_version"]:
+        raise SystemExit(f"[ERROR] {entry['path']}: schema_version does not match the snapshot's DDL")
+    target = os.path.join(root, entry["path"])
+    if force or not os.path.exists(target):
+        return
+    current = sqlite3.connect(target)
+    if schema_version(current) == entry["schema_version"]:
+        current.close()
+        return
+    have = table_columns(current)
+    current.close()
+    incoming = sqlite3.connect(":memory:")
+    for table in entry["tables"]:
+        incoming.execute(table["sql"])
+    offered = table_columns(incoming)
+    incoming.close()
+    # Extra tables/columns are fine (a newer pipeline); losing ones the app reads today is not.
+    missing = [f"{name}.{col}" if name in offered else name
+               for name, cols in have.items() for col in sorted(cols)
+               if name not in offered or col not in offered[name]]
+    if missing:
+        raise SystemExit(
+            f"[ERROR] {entry['path']}: snapshot schema {entry['schema_version']} lacks "
+            f"{', '.join(sorted(set(missing)))}; use --force to import anyway"
+        )
+
+
+def stage_db(zf, entry, tmp):
+    conn = sqlite3.connect(tmp, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("BEGIN")
+        for table in entry["tables"]:
+            conn.execute(table["sql"])
+            load_table(conn, zf, table)
+        # Indexes are built once over the loaded data rather than maintained row by row.
+        for sql in entry["indexes"]:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def import_snapshot(path, root=".", force=False):
+    with zipfile.ZipFile(path) as zf:
+        manifest = read_manifest(zf)
+        # Every check runs before any file is touched.
+        for entry in manifest["databases"]:
+            check_schema(entry, root, force)
+
+        staged = []
+        try:
+            for entry in manifest["databases"]:
+                target = os.path.join(root, entry["path"])
+                os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+                tmp = target + ".importing"
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                staged.append((tmp, target))
+                stage_db(zf, entry, tmp)
+
+            # Only once every DB has loaded and verified are the finished files swapped in,
+            # so neither a running app nor a failed import leaves a half-replaced set.
+            for tmp, target in staged:
+                os.replace(tmp, target)
+        finally:
+            for tmp, _ in staged:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+    return manifest
+
+# --------------------------------
+# CLI
+# --------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Export / import analytics DB snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write every analytics DB into one compressed snapshot")
+    export.add_argument("snapshot")
+    export.add_argument("--root", default=".")
+    restore = sub.add_parser("import", help="bulk-load a snapshot, replacing the DBs it contains")
+    restore.add_argument("snapshot")
+    restore.add_argument("--root", default=".")
+    restore.add_argument("--force", action="store_true", help="import even if tables or columns would be lost")
+    info = sub.add_parser("info", help="print a snapshot's manifest")
+    info.add_argument("snapshot")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == "export":
+        manifest = export_snapshot(args.snapshot, args.root)
+        action = "Exported"
+    elif args.command == "import":
+        manifest = import_snapshot(args.snapshot, args.root, args.force)
+        action = "Imported"
+    else:
+        with zipfile.ZipFile(args.snapshot) as zf:
+            print(json.dumps(read_manifest(zf), indent=2))
+        return
+
+    tables = sum(len(entry["tables"]) for entry in manifest["databases"])
+    rows = sum(t["rows"] for entry in manifest["databases"] for t in entry["tables"])
+    print(
+        f"[INFO] {action} {len(manifest['databases'])} DB(s), {tables} tables, {rows:,} rows "
+        f"in {time.perf_counter() - started:.2f}s → {args.snapshot}"
+    )
+
+
+if __name__ == "__main__":
+    main()
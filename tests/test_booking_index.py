@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+import booking_index
+from booking_index import BookingIndex, filter_file
+
+HEADER = "Date,Time,Booking ID,Booking Status\n"
+
+
+def write_export(path, rows):
+    with open(path, "w") as f:
+        f.write(HEADER)
+        f.writelines(f"2024-01-01,10:00:00,{booking},{status}\n" for booking, status in rows)
+    return str(path)
+
+
+def read_rows(path):
+    with open(path) as f:
+        return f.readlines()[1:]
+
+
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    # Small slices, so a few hundred IDs already spread over several memory-mapped files.
+    monkeypatch.setattr(booking_index, "INITIAL_CAPACITY", 64)
+    return str(tmp_path / "index.db")
+
+
+def run(index_path, src, dst, batch):
+    index = BookingIndex(index_path)
+    try:
+        result = filter_file(src, dst, index, batch)
+        index.save()
+    finally:
+        index.close()
+    return result
+
+
+def test_overlapping_exports_drop_resends_and_keep_updates(tmp_path, index_path):
+    first = write_export(tmp_path / "day1.csv", [(f"CNR{i}", "Incomplete") for i in range(300)])
+    # Day 2 re-sends 100-299: 100-199 unchanged, 200-299 completed since; 300-399 are new.
+    second = write_export(tmp_path / "day2.csv", [(f"CNR{i}", "Incomplete") for i in range(100, 200)]
+                          + [(f"CNR{i}", "Completed") for i in range(200, 400)])
+
+    assert run(index_path, first, tmp_path / "out1.csv", "day1") == (300, 0, 0)
+    assert run(index_path, second, tmp_path / "out2.csv", "day2") == (200, 100, 100)
+    kept = read_rows(tmp_path / "out2.csv")
+    assert {line.split(",")[2] for line in kept} == {f"CNR{i}" for i in range(200, 400)}
+    assert all(line.rstrip().endswith("Completed") for line in kept)
+
+    index = BookingIndex(index_path)
+    assert index.stats()["keys"] == 400
+    index.close()
+
+
+def test_rerunning_an_export_replays_it(tmp_path, index_path):
+    first = write_export(tmp_path / "day1.csv", [(f"CNR{i}", "Incomplete") for i in range(300)])
+    second = write_export(tmp_path / "day2.csv", [(f"CNR{i}", "Completed") for i in range(200, 400)])
+    run(index_path, first, tmp_path / "out1.csv", "day1")
+    first_run = run(index_path, second, tmp_path / "out2.csv", "day2")
+    expected = read_rows(tmp_path / "out2.csv")
+
+    # Same batch id: its own earlier keys are not history, so the output is reproduced exactly.
+    assert run(index_path, second, tmp_path / "again.csv", "day2") == first_run
+    assert read_rows(tmp_path / "again.csv") == expected
+    # A different id for the same content is a re-send of every row.
+    assert run(index_path, second, tmp_path / "resent.csv", "day3") == (0, 0, 200)
+
+
+def test_rows_without_an_id_are_never_dropped(tmp_path, index_path):
+    rows = [("null", "Completed"), ("null", "Completed"), ("", "Incomplete"), ("CNR1", "Completed")]
+    export = write_export(tmp_path / "day1.csv", rows)
+    assert run(index_path, export, tmp_path / "out1.csv", "day1") == (4, 0, 0)
+    assert run(index_path, export, tmp_path / "out2.csv", "day2") == (3, 0, 1)
+
+
+def test_filter_survives_reopening_across_slices(tmp_path, index_path):
+    ids = [(f"CNR{i}", "Completed") for i in range(1000)]
+    export = write_export(tmp_path / "all.csv", ids)
+    run(index_path, export, tmp_path / "out.csv", "all")
+
+    # Fresh process view: slice bits come back from the memory-mapped files, so no ID is missed.
+    index = BookingIndex(index_path)
+    slices = index.stats()["slices"]
+    assert slices > 1
+    assert sorted(os.listdir(index_path + ".bloom")) == sorted(f"slice-{i}.bits" for i in range(slices))
+    keys = [f"cnr{i}" for i in range(1000)]
+    assert index.bloom.contains(*booking_index.hash_pair(keys)).all()
+    index.close()
+    assert run(index_path, export, tmp_path / "again.csv", "resent") == (0, 0, 1000)
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+import data
+import query_plans
+import queries
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Large enough that every bookings-sized table is well past SMALL_TABLE_ROWS.
+ROWS = int(os.environ.get("QUERY_PLANS_TEST_ROWS", 50_000))
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    workdir = str(tmp_path_factory.mktemp("query_plans"))
+    cwd = os.getcwd()
+    os.chdir(ROOT)      # the pipeline scripts are run from the repo root
+    try:
+        return os.path.abspath(query_plans.build(ROWS, workdir, rebuild=False))
+    finally:
+        os.chdir(cwd)
+
+
+def test_no_statement_scans_a_large_table(db, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    # capture() repoints these at the DB under test; put them back afterwards.
+    for module, name in ((queries, "DB_PATH"), (queries, "CATALOG_PATH"), (data, "DB_PATH"), (data, "CSV_PATH")):
+        monkeypatch.setattr(module, name, getattr(module, name))
+
+    statements, errors = query_plans.capture(db)
+    assert not errors, f"dashboard raised: {errors}"
+    report = query_plans.analyse(db, statements)
+    callers = {c for r in report for c in r["callers"]}
+    assert {"queries.kpis", "queries.rides_within", "api.build_body"} <= callers
+    failures = {f"{c} ({t})" for r in report for c in r["callers"] for t in r["full_scans"]}
+    assert not failures, f"statements scan a large table: {', '.join(sorted(failures))}"
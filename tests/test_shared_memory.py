@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+import bench_shared_memory as bench
+import shared_dataset
+from bench_query_engines import dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROWS = int(os.environ.get("SHARED_MEMORY_TEST_ROWS", 200_000))
+PROCESSES = 4
+
+
+@pytest.fixture(scope="module")
+def published(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("shared_memory")
+    cwd = os.getcwd()
+    os.chdir(ROOT)      # dataset() runs bench_data.py from the repo root
+    try:
+        csv = dataset(ROWS, str(workdir))
+    finally:
+        os.chdir(cwd)
+    root = str(workdir / "shared")
+    version, _ = shared_dataset.publish(csv, root)
+    size_mb = os.path.getsize(os.path.join(shared_dataset.dataset_dir(csv, root), version, shared_dataset.DATA_FILE)) / 2**20
+    return csv, root, size_mb
+
+
+def test_processes_share_one_copy(published):
+    csv, root, size_mb = published
+    total = bench.measure("shared", PROCESSES, csv, root)
+    # N processes together hold about one copy of the dataset, not N.
+    bound = size_mb * (1 + bench.MAX_GROWTH * (PROCESSES - 1))
+    assert total["data_pss"] <= bound
+
+
+def test_private_copies_exceed_the_bound(published):
+    # Guards the measurement itself: without sharing, the same check has to fail.
+    csv, root, size_mb = published
+    total = bench.measure("private", PROCESSES, csv, root)
+    assert total["data_pss"] > size_mb * (1 + bench.MAX_GROWTH * (PROCESSES - 1))
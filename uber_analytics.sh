@@ -1,6 +1,6 @@
 #!/bin/bash
 
-FILE="ncr_ride_bookings_clean.csv"
+FILE="${1:-ncr_ride_bookings_clean.csv}"
 
 
 # Remove header
@@ -55,7 +55,7 @@ echo "9. Ride quality metrics:"
 echo "Average Ride Distance (km):"
 echo "$DATA" | awk -F',' '{sum+=$18; c++} END{printf "%.2f\n", sum/c}'
 echo "Average Driver Rating:"
-echo "$DATA" | awk -F',' '$19!=""{sum+=$19; c++} END{printf "%.2f\n", sum/c}'
+echo "$DATA" | awk -F',' '$19 ~ /^[0-9]+(\.[0-9]+)?$/{sum+=$19; c++} END{printf "%.2f\n", sum/c}'
 echo "--------------------------------------------------"
 
 # 🔟 Payment method usage
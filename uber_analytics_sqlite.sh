@@ -1,7 +1,7 @@
 #!/bin/bash
 
-FILE="ncr_ride_bookings_clean.csv"
-DB="ncr_ride_analytics.db"
+FILE="${1:-ncr_ride_bookings_clean.csv}"
+DB="${2:-ncr_ride_analytics.db}"
 
 echo "================ BASIC RIDE ANALYTICS ================"
 
@@ -18,10 +18,16 @@ DROP TABLE IF EXISTS top_drop_locations;
 DROP TABLE IF EXISTS vehicle_demand;
 DROP TABLE IF EXISTS cancellations;
 DROP TABLE IF EXISTS payment_methods;
+DROP TABLE IF EXISTS cancellation_facts;
+DROP TABLE IF EXISTS daily_rides;
+DROP TABLE IF EXISTS od_pairs;
+DROP TABLE IF EXISTS revenue_segments;
 
+-- n: rows the value was taken over, the weight when partitions are merged
 CREATE TABLE summary_metrics (
     metric TEXT,
-    value REAL
+    value REAL,
+    n INTEGER
 );
 
 CREATE TABLE ride_status_distribution (
@@ -53,11 +59,46 @@ CREATE TABLE payment_methods (
     method TEXT,
     count INTEGER
 );
+
+CREATE TABLE cancellation_facts (
+    canceller TEXT,
+    reason TEXT,
+    vehicle_type TEXT,
+    pickup_location TEXT,
+    hour INTEGER,
+    total INTEGER
+);
+
+CREATE TABLE daily_rides (
+    date TEXT,
+    status TEXT,
+    vehicle_type TEXT,
+    rides INTEGER
+);
+
+CREATE TABLE od_pairs (
+    pickup_location TEXT,
+    drop_location TEXT,
+    status TEXT,
+    vehicle_type TEXT,
+    trips INTEGER
+);
+
+CREATE TABLE revenue_segments (
+    segment TEXT,
+    segment_value TEXT,
+    bookings INTEGER,
+    valued INTEGER,
+    revenue_paise INTEGER,
+    completed INTEGER,
+    completed_paise INTEGER,
+    PRIMARY KEY (segment, segment_value)
+) WITHOUT ROWID;
 EOF
 
 
 TOTAL_BOOKINGS=$(echo "$DATA" | wc -l)
-sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Total Bookings', $TOTAL_BOOKINGS);"
+sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Total Bookings', $TOTAL_BOOKINGS, $TOTAL_BOOKINGS);"
 
 
 echo "$DATA" | awk -F',' '{print $4}' | sort | uniq -c |
@@ -66,12 +107,49 @@ while read count status; do
 done
 
 
-TOTAL_REVENUE=$(echo "$DATA" | awk -F',' '$4=="Completed"{sum+=$17} END{print sum}')
-sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Total Revenue (Completed)', $TOTAL_REVENUE);"
-
-
-AVG_BOOKING=$(echo "$DATA" | awk -F',' '{sum+=$17;c++} END{print sum/c}')
-sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Average Booking Value', $AVG_BOOKING);"
+# -------------------------------
+# Revenue segments (exact integer paise, every breakdown in one pass)
+# -------------------------------
+{
+echo "BEGIN;"
+echo "$DATA" | awk -F',' '
+function q(s) { gsub(/\047/, "\047\047", s); return "\047" s "\047" }
+# Decimal string -> integer paise without a float in between; half-up on the 3rd decimal.
+function paise(v,    i, f) {
+    i = index(v, ".")
+    if (!i) return v * 100
+    f = substr(v, i + 1) "000"
+    return substr(v, 1, i - 1) * 100 + substr(f, 1, 2) + (substr(f, 3, 1) >= 5)
+}
+{
+    gsub(/\r/, "")
+    valued = ($17 ~ /^[0-9]+(\.[0-9]+)?$/)
+    p = valued ? paise($17) : 0
+    completed = valued && $4 == "Completed"
+    key["all"] = "all"; key["status"] = $4; key["vehicle"] = $6
+    key["payment"] = $21; key["pickup_location"] = $7; key["day"] = $1
+    for (s in key) {
+        k = s SUBSEP key[s]
+        bookings[k]++; n[k] += valued; rev[k] += p
+        done[k] += completed; done_rev[k] += completed ? p : 0
+    }
+}
+END {
+    for (k in bookings) {
+        split(k, f, SUBSEP)
+        printf "INSERT INTO revenue_segments VALUES (%s, %s, %d, %d, %.0f, %d, %.0f);\n", q(f[1]), q(f[2]), bookings[k], n[k], rev[k], done[k], done_rev[k]
+    }
+}'
+echo "COMMIT;"
+} | sqlite3 "$DB"
+
+# Paise sums are exact (awk doubles hold integers up to 2^53); the average skips rows without a value.
+sqlite3 "$DB" <<EOF
+INSERT INTO summary_metrics
+SELECT 'Total Revenue (Completed)', completed_paise / 100.0, completed FROM revenue_segments WHERE segment = 'all';
+INSERT INTO summary_metrics
+SELECT 'Average Booking Value', revenue_paise / 100.0 / valued, valued FROM revenue_segments WHERE segment = 'all';
+EOF
 
 
 echo "$DATA" | awk -F',' '{print $7}' | sort | uniq -c | sort -nr | head -5 |
@@ -99,11 +177,35 @@ sqlite3 "$DB" "INSERT INTO cancellations VALUES ('Customer', $CUST_CANCEL);"
 sqlite3 "$DB" "INSERT INTO cancellations VALUES ('Driver', $DRIVER_CANCEL);"
 
 
+# -------------------------------
+# Cancellation facts (canceller x reason x vehicle x pickup x hour)
+# -------------------------------
+{
+echo "BEGIN;"
+echo "$DATA" | awk -F',' '
+function q(s) { gsub(/\r/, "", s); gsub(/\047/, "\047\047", s); return "\047" s "\047" }
+{
+    hour = substr($2, 1, 2) + 0
+    if ($11 + 0 > 0) facts["Customer" SUBSEP $12 SUBSEP $6 SUBSEP $7 SUBSEP hour] += $11
+    if ($13 + 0 > 0) facts["Driver" SUBSEP $14 SUBSEP $6 SUBSEP $7 SUBSEP hour] += $13
+}
+END {
+    for (k in facts) {
+        split(k, f, SUBSEP)
+        printf "INSERT INTO cancellation_facts VALUES (%s, %s, %s, %s, %d, %d);\n", q(f[1]), q(f[2]), q(f[3]), q(f[4]), f[5], facts[k]
+    }
+}'
+echo "CREATE INDEX idx_cancellation_facts_reason ON cancellation_facts (canceller, reason, vehicle_type, pickup_location, hour, total);"
+echo "CREATE INDEX idx_cancellation_facts_zone ON cancellation_facts (canceller, pickup_location, vehicle_type, hour, total);"
+echo "COMMIT;"
+} | sqlite3 "$DB"
+
+
 AVG_DISTANCE=$(echo "$DATA" | awk -F',' '{sum+=$18;c++} END{print sum/c}')
-AVG_DRIVER_RATING=$(echo "$DATA" | awk -F',' '$19!=""{sum+=$19;c++} END{print sum/c}')
+read AVG_DRIVER_RATING RATED_RIDES <<< "$(echo "$DATA" | awk -F',' '$19 ~ /^[0-9]+(\.[0-9]+)?$/{sum+=$19;c++} END{print sum/c, c}')"
 
-sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Average Ride Distance', $AVG_DISTANCE);"
-sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Average Driver Rating', $AVG_DRIVER_RATING);"
+sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Average Ride Distance', $AVG_DISTANCE, $TOTAL_BOOKINGS);"
+sqlite3 "$DB" "INSERT INTO summary_metrics VALUES ('Average Driver Rating', $AVG_DRIVER_RATING, $RATED_RIDES);"
 
 
 echo "$DATA" | awk -F',' '{print $21}' | sort | uniq -c | sort -nr |
@@ -111,6 +213,56 @@ while read count method; do
     sqlite3 "$DB" "INSERT INTO payment_methods VALUES ('$method', $count);"
 done
 
+
+# -------------------------------
+# Daily rides and OD pairs (status x vehicle)
+# -------------------------------
+{
+echo "BEGIN;"
+echo "$DATA" | awk -F',' '
+function q(s) { gsub(/\r/, "", s); gsub(/\047/, "\047\047", s); return "\047" s "\047" }
+{
+    daily[$1 SUBSEP $4 SUBSEP $6]++
+    od[$7 SUBSEP $8 SUBSEP $4 SUBSEP $6]++
+}
+END {
+    for (k in daily) {
+        split(k, f, SUBSEP)
+        printf "INSERT INTO daily_rides VALUES (%s, %s, %s, %d);\n", q(f[1]), q(f[2]), q(f[3]), daily[k]
+    }
+    for (k in od) {
+        split(k, f, SUBSEP)
+        printf "INSERT INTO od_pairs VALUES (%s, %s, %s, %s, %d);\n", q(f[1]), q(f[2]), q(f[3]), q(f[4]), od[k]
+    }
+}'
+echo "CREATE INDEX idx_daily_rides ON daily_rides (status, vehicle_type, date, rides);"
+echo "CREATE INDEX idx_od_pairs ON od_pairs (status, vehicle_type, pickup_location, drop_location, trips);"
+echo "COMMIT;"
+} | sqlite3 "$DB"
+
+# -------------------------------
+# Rating stats (per vehicle / pickup location / day, mergeable)
+# -------------------------------
+python3 ratings_stats.py "$FILE" "$DB"
+
+# -------------------------------
+# Location dimension, spatial index and OD distance bands
+# -------------------------------
+python3 locations.py "$FILE" "$DB"
+
+# -------------------------------
+# Anomaly detection (seasonal EWMA per pickup location x hour; state persists across runs)
+# uber_partition.sh sets DETECT_ANOMALIES=0 and scores months in order against a per-city store.
+# -------------------------------
+if [ "${DETECT_ANOMALIES:-1}" = "1" ]; then
+  python3 anomaly_detector.py detect "$FILE" "$DB"
+fi
+
+# -------------------------------
+# Shared dataset (typed Arrow file memory-mapped by every dashboard process)
+# -------------------------------
+python3 shared_dataset.py publish "$FILE"
+
 echo "===================================================="
 echo "✅ Analytics successfully stored in SQLite database:"
 echo "   → $DB"
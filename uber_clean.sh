@@ -1,9 +1,13 @@
 #!/bin/bash
 
 #
-INPUT="ncr_ride_bookings_dirty.csv"
-OUTPUT="ncr_ride_bookings_clean.csv"
-TMP="__tmp_clean.csv"
+INPUT="${1:-ncr_ride_bookings_dirty.csv}"
+OUTPUT="${2:-ncr_ride_bookings_clean.csv}"
+TMP="${OUTPUT}.__tmp_clean.csv"
+BOOKING_INDEX="${BOOKING_INDEX:-booking_index.db}"
+RULES="${RULES:-cleaning_rules.json}"
+# One id per export: the same file name is reused for every daily export, its content is not.
+BATCH="${BATCH:-$(sha256sum "$INPUT" | cut -c1-16)}"
 
 set -e
 
@@ -12,100 +16,25 @@ log() {
 }
 
 
-# 1. REMOVE LEADING / TRAILING WHITESPACE
+# 1. APPLY CLEANING RULES
+# Trim, null tokens, types, per-column ranges/abs/clip, case and regex normalization,
+# and dedupe on the rule key, all in one chunked pass (see clean_rules.py / $RULES)
 
-trim_whitespace() {
-  log "Trimming whitespaces"
-  sed 's/^[ \t]*//;s/[ \t]*$//' "$INPUT" > "$TMP"
+apply_rules() {
+  log "Applying cleaning rules from $RULES"
+  python3 clean_rules.py "$INPUT" "$TMP" --rules "$RULES"
 }
 
 
-# 2. NORMALIZE NULL VALUES
+# 2. REMOVE BOOKINGS RE-SENT UNCHANGED FROM EARLIER BATCHES
+# Persistent Bloom filter + SQLite key table, keyed on Booking ID (see booking_index.py).
+# A known Booking ID whose row changed (e.g. Incomplete -> Completed) is kept as an
+# update: uber_partition.sh merges by Booking ID and the newer batch wins.
 
-normalize_nulls() {
-  log "Normalizing NULL values"
-  sed -i '
-    s/, *,/,/g;
-    s/,,/,NULL,/g;
-    s/^,/NULL,/g;
-    s/,$/,NULL/g;
-    s/\bNaN\b/NULL/g;
-    s/\bnan\b/NULL/g;
-  ' "$TMP"
-}
-
-
-# 3. REMOVE DUPLICATES (EXACT ROW MATCH)
-
-remove_duplicates() {
-  log "Removing duplicate rows"
-  awk '!seen[$0]++' "$TMP" > "$TMP.dup"
-  mv "$TMP.dup" "$TMP"
-}
-
-
-# 4. FIX NEGATIVE NUMERIC VALUES
-
-fix_negatives() {
-  log "Fixing negative numeric values"
-  awk -F',' '
-  NR==1 {print; next}
-  {
-    for (i=1; i<=NF; i++) {
-      if ($i ~ /^-[0-9]+(\.[0-9]+)?$/) {
-        $i = abs($i)
-      }
-    }
-    print
-  }
-  function abs(x){return x<0?-x:x}
-  ' OFS=',' "$TMP" > "$TMP.neg"
-  mv "$TMP.neg" "$TMP"
-}
-
-
-cap_outliers() {
-  log "Capping extreme outliers"
-
-  awk -F',' '
-  NR==1 {
-    print
-    next
-  }
-  {
-    for (i=1; i<=NF; i++) {
-      if ($i ~ /^[0-9]+(\.[0-9]+)?$/ && $i > 1000000) {
-        $i = 1000000
-      }
-    }
-    print
-  }
-  ' OFS=',' "$TMP" > "$TMP.out"
-  mv "$TMP.out" "$TMP"
-}
-
-
-standardize_text() {
-  log "Standardizing text columns (lowercase)"
-  awk -F',' '
-  NR==1 {print; next}
-  {
-    for (i=1; i<=NF; i++) {
-      if ($i ~ /[A-Za-z]/) {
-        gsub(/^[ \t]+|[ \t]+$/, "", $i)
-        $i = tolower($i)
-      }
-    }
-    print
-  }
-  ' OFS=',' "$TMP" > "$TMP.txt"
-  mv "$TMP.txt" "$TMP"
-}
-
-
-final_sanity() {
-  log "Final sanity cleanup"
-  sed -i 's/NULL,NULL/NULL/g' "$TMP"
+remove_seen_bookings() {
+  log "Removing bookings re-sent unchanged from earlier batches"
+  python3 booking_index.py --index "$BOOKING_INDEX" filter "$TMP" "$TMP.seen" --batch "$BATCH"
+  mv "$TMP.seen" "$TMP"
 }
 
 
@@ -113,13 +42,8 @@ final_sanity() {
 
 log "Starting cleaning pipeline"
 
-trim_whitespace
-normalize_nulls
-remove_duplicates
-fix_negatives
-cap_outliers
-standardize_text
-final_sanity
+apply_rules
+remove_seen_bookings
 
 mv "$TMP" "$OUTPUT"
 
@@ -0,0 +1,165 @@
+#!/bin/bash
+
+#
+# Split a cleaned bookings file into city/month partitions, build one
+# analytics DB per partition and register them in the partition catalog.
+#
+#   bash uber_partition.sh <clean_csv> <city> [parallel_jobs]
+#
+# Only the months present in the input are rebuilt; every other
+# partition is left untouched. Each batch is merged into its months by
+# Booking ID, the newer row winning: uber_clean.sh has already dropped
+# unchanged re-sends, so even a batch spanning a whole month may not
+# hold all of it. Anomaly
+# baselines live in one store per city, outside the rebuilt DBs, and
+# carry over from month to month.
+#
+INPUT="${1:-ncr_ride_bookings_clean.csv}"
+CITY="${2:-ncr}"
+JOBS="${3:-4}"
+ROOT="partitions"
+CATALOG="$ROOT/catalog.db"
+MANIFEST="$ROOT/$CITY/.manifest"
+ANOMALY_STORE="$ROOT/$CITY/anomaly_state.db"
+
+set -e
+
+log() {
+  echo "[INFO] $1"
+}
+
+
+# 1. SPLIT BY MONTH
+
+split_by_month() {
+  log "Splitting $INPUT into monthly partitions for $CITY"
+  mkdir -p "$ROOT/$CITY"
+  awk -F',' -v root="$ROOT/$CITY" '
+  NR==1 {
+    next
+  }
+  $1 !~ /^[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]/ {
+    skipped++
+    next
+  }
+  {
+    month = substr($1, 1, 7)
+    out = root "/" month "/.incoming.csv"
+    if (!(month in rows)) {
+      system("mkdir -p \"" root "/" month "\"")
+      printf "" > out
+    }
+    print > out
+    rows[month]++
+  }
+  END {
+    for (m in rows) print m
+    if (skipped) print "[WARN] skipped " skipped " rows without a valid date" > "/dev/stderr"
+  }
+  ' "$INPUT" | sort > "$MANIFEST.months"
+}
+
+
+# 1b. MERGE INTO EXISTING MONTHS (BOOKING ID WINS FROM THE NEWER BATCH)
+# This is where corrected re-sends replace their earlier rows; uber_clean.sh only
+# drops re-sends that are identical to what was already ingested.
+
+merge_months() {
+  header=$(head -n 1 "$INPUT")
+  : > "$MANIFEST"
+  while read month; do
+    dir="$ROOT/$CITY/$month"
+    if [ -f "$dir/bookings_clean.csv" ]; then
+      log "Merging $month into existing partition"
+      # Keep earlier rows whose Booking ID the new batch doesn't carry, then append the batch.
+      awk -F',' 'FNR==NR { seen[$3]; next } FNR==1 || !($3 in seen)' \
+        "$dir/.incoming.csv" "$dir/bookings_clean.csv" > "$dir/.merged.csv"
+    else
+      echo "$header" > "$dir/.merged.csv"
+    fi
+    cat "$dir/.incoming.csv" >> "$dir/.merged.csv"
+    mv "$dir/.merged.csv" "$dir/bookings_clean.csv"
+    rm -f "$dir/.incoming.csv"
+    awk -F',' -v month="$month" '
+    NR > 1 {
+      rows++
+      if (first == "" || $1 < first) first = $1
+      if ($1 > last) last = $1
+    }
+    END { print month, rows, first, last }
+    ' "$dir/bookings_clean.csv" >> "$MANIFEST"
+  done < "$MANIFEST.months"
+  rm -f "$MANIFEST.months"
+}
+
+
+# 2. BUILD ONE ANALYTICS DB PER PARTITION (IN PARALLEL)
+
+build_partitions() {
+  log "Building $(wc -l < "$MANIFEST") partition(s) with $JOBS parallel job(s)"
+  cut -d' ' -f1 "$MANIFEST" |
+  xargs -P "$JOBS" -I{} sh -c '
+    dir="$0/{}"
+    rm -f "$dir/analytics.db"
+    DETECT_ANOMALIES=0 bash uber_analytics_sqlite.sh "$dir/bookings_clean.csv" "$dir/analytics.db" > "$dir/build.log"
+  ' "$ROOT/$CITY"
+}
+
+
+# 2b. SCORE ANOMALIES (SEQUENTIAL, OLDEST MONTH FIRST)
+
+detect_anomalies() {
+  log "Scoring anomalies against $ANOMALY_STORE"
+  # The day left open by the last run may sit in a month this batch doesn't rebuild;
+  # its alerts are rewritten once it closes, so that partition is refreshed too.
+  open_month=$(sqlite3 "$ANOMALY_STORE" \
+    "SELECT DISTINCT strftime('%Y-%m', day * 86400, 'unixepoch') FROM anomaly_pending" 2>/dev/null || true)
+  while read month rows first last; do
+    python3 anomaly_detector.py detect "$ROOT/$CITY/$month/bookings_clean.csv" "$ANOMALY_STORE" \
+      >> "$ROOT/$CITY/$month/build.log"
+  done < "$MANIFEST"
+  { cut -d' ' -f1 "$MANIFEST"; echo "$open_month"; } | sort -u |
+  while read month; do
+    if [ -n "$month" ] && [ -f "$ROOT/$CITY/$month/analytics.db" ]; then
+      python3 anomaly_detector.py export "$ANOMALY_STORE" "$ROOT/$CITY/$month/analytics.db" --month "$month" > /dev/null
+    fi
+  done
+}
+
+
+# 3. REGISTER IN CATALOG
+
+register_partitions() {
+  log "Registering partitions in $CATALOG"
+  {
+  echo "CREATE TABLE IF NOT EXISTS partitions (
+    city TEXT,
+    month TEXT,
+    csv_path TEXT,
+    db_path TEXT,
+    row_count INTEGER,
+    min_date TEXT,
+    max_date TEXT,
+    built_at TEXT,
+    PRIMARY KEY (city, month)
+  );"
+  echo "BEGIN;"
+  while read month rows first last; do
+    dir="$ROOT/$CITY/$month"
+    echo "INSERT OR REPLACE INTO partitions VALUES ('$CITY', '$month', '$dir/bookings_clean.csv', '$dir/analytics.db', $rows, '$first', '$last', datetime('now'));"
+  done < "$MANIFEST"
+  echo "COMMIT;"
+  } | sqlite3 "$CATALOG"
+}
+
+
+# PIPELINE
+
+split_by_month
+merge_months
+build_partitions
+detect_anomalies
+register_partitions
+rm -f "$MANIFEST"
+
+log "Partitions for $CITY ready → $ROOT/$CITY"